@@ -0,0 +1,102 @@
+import threading
+import time
+
+# after a failed rebuild (DB down, pool exhausted) wait this long before retrying
+RETRY_SECONDS = 10
+
+
+# ======================================================
+# BACKGROUND REFRESH (single-flight)
+# ======================================================
+class BackgroundRefresh:
+    """
+    Holds one in-memory index built by load() and keeps it fresh without
+    making readers wait. Once the index is dirty or older than `ttl`,
+    get() starts a single background rebuild and keeps returning the
+    previous value until it lands. The scan path reads these indexes
+    while holding a pooled connection, so it must never rebuild inline.
+
+    load() returns the new value, or None when the database is
+    unavailable; a failed rebuild leaves the index dirty and is retried
+    after RETRY_SECONDS.
+    """
+
+    def __init__(self, name, load, ttl):
+        self.name = name
+        self.load = load
+        self.ttl = ttl
+        self.value = None
+        self.built_at = 0.0
+        self.dirty = True
+        self._retry_at = 0.0
+        self._running = False
+        self._lock = threading.Lock()           # guards _running
+        self._rebuild_lock = threading.Lock()   # one load() at a time
+
+    def rebuild(self):
+        """Blocking rebuild (startup, CLI). Serialized with background rebuilds."""
+        with self._rebuild_lock:
+            return self._rebuild()
+
+    def _rebuild(self):
+        # cleared before the read: an invalidate() that lands while
+        # load() runs marks the result dirty again
+        self.dirty = False
+        try:
+            value = self.load()
+        except Exception as e:
+            print(f"❌ {self.name} rebuild failed:", e)
+            value = None
+
+        if value is None:
+            self.dirty = True
+            self._retry_at = time.monotonic() + RETRY_SECONDS
+            return False
+
+        self.swap(value)
+        self.built_at = time.monotonic()
+        return True
+
+    def swap(self, value):
+        """Installs a loaded value. Override to merge edits made during load()."""
+        self.value = value
+
+    def invalidate(self):
+        self.dirty = True
+        self._retry_at = 0.0
+
+    def is_stale(self):
+        return self.dirty or time.monotonic() - self.built_at > self.ttl
+
+    def get(self, wait=False):
+        """
+        Current value (None before the first build). By default a stale
+        value is returned while a background rebuild runs; wait=True
+        rebuilds first, for admin endpoints that must show their own
+        writes (never from the scan path).
+        """
+        if self.is_stale() and time.monotonic() >= self._retry_at:
+            if not wait:
+                self.refresh_async()
+            else:
+                with self._rebuild_lock:
+                    # a concurrent caller may have rebuilt while we waited
+                    if self.is_stale():
+                        self._rebuild()
+        return self.value
+
+    def refresh_async(self):
+        """Starts a background rebuild unless one is already running."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+
+        def run():
+            try:
+                self.rebuild()
+            finally:
+                with self._lock:
+                    self._running = False
+
+        threading.Thread(target=run, name=f"{self.name}-refresh", daemon=True).start()
@@ -0,0 +1,39 @@
+# ======================================================
+# BATCHED INSERTS WITH PER-ROW FALLBACK
+# ======================================================
+# Bulk uploads (members, timetable) write in executemany batches. One
+# bad row (too long, FK miss, duplicate key) makes MySQL reject the
+# whole statement, so the batch is retried row by row inside a
+# savepoint and only the rows that fail are reported.
+
+# rows per executemany; uploads write (and forget) one batch at a time
+BATCH_SIZE = 500
+
+
+def write_batch(cur, query, batch, errors, describe=None):
+    """
+    batch: [(line_no, values)]. Failed rows are appended to `errors` as
+    {"row", **describe(values), "reason"}. Returns the written
+    (line_no, values) pairs.
+    """
+    cur.execute("SAVEPOINT bulk_batch")
+    try:
+        cur.executemany(query, [values for _, values in batch])
+        cur.execute("RELEASE SAVEPOINT bulk_batch")
+        return batch
+    except Exception:
+        cur.execute("ROLLBACK TO SAVEPOINT bulk_batch")
+
+    written = []
+    for line_no, values in batch:
+        try:
+            cur.execute(query, values)
+            written.append((line_no, values))
+        except Exception as e:
+            error = {"row": line_no}
+            if describe is not None:
+                error.update(describe(values))
+            error["reason"] = str(e)
+            errors.append(error)
+    cur.execute("RELEASE SAVEPOINT bulk_batch")
+    return written
@@ -0,0 +1,75 @@
+from datetime import date, datetime
+from background_refresh import BackgroundRefresh
+from database import get_db_connection
+from utils import normalize_text
+
+# rebuild at least this often so edits made through another worker show up
+REFRESH_SECONDS = 300
+
+# event types on which no lectures run (stored upper-case by the router)
+NON_TEACHING_TYPES = {"HOLIDAY", "EXAM"}
+
+
+# ======================================================
+# ACADEMIC CALENDAR INDEX
+# ======================================================
+# date → {event_type}, loaded from academic_calendar in one query.
+# The scan path asks non_teaching(day) before matching the timetable,
+# so a holiday or exam day never produces a SKIP (or its email).
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def _load():
+    conn = get_db_connection()
+    if conn is None:
+        return None
+
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT date, event_type FROM academic_calendar WHERE date IS NOT NULL")
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    days = {}
+    for day, event_type in rows:
+        try:
+            day = _to_date(day)
+        except ValueError:
+            continue
+        days.setdefault(day, set()).add(normalize_text(event_type, "upper") or "")
+    return days
+
+
+# read on the scan path: never rebuilt inline, see BackgroundRefresh
+_days = BackgroundRefresh("calendar-index", _load, REFRESH_SECONDS)
+
+
+def rebuild():
+    """Blocking rebuild, used at startup."""
+    return _days.rebuild()
+
+
+def invalidate():
+    """Called by the /academic-calendar write endpoints."""
+    _days.invalidate()
+
+
+def events_on(day):
+    days = _days.get() or {}
+    return days.get(_to_date(day), set())
+
+
+def non_teaching(day):
+    """The non-teaching event type for `day` (e.g. 'HOLIDAY'), or None."""
+    for event_type in sorted(events_on(day)):
+        if event_type in NON_TEACHING_TYPES:
+            return event_type
+    return None
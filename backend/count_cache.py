@@ -0,0 +1,67 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ======================================================
+# COUNT CACHE (per filter signature)
+# ======================================================
+class CountCache:
+    """
+    Keeps exact COUNT(*) results per filter signature.
+    Stale or missing entries are recomputed in the background, so a
+    request never has to wait for the count unless it asks to.
+    """
+
+    def __init__(self, ttl=60, max_entries=500, workers=2):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}          # key -> (count, computed_at)
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="count-cache")
+
+    def get(self, key):
+        """Returns (count or None, is_fresh)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        count, computed_at = entry
+        return count, (time.monotonic() - computed_at) <= self.ttl
+
+    def put(self, key, count):
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # drop the oldest signature
+                oldest = min(self._entries, key=lambda k: self._entries[k][1])
+                self._entries.pop(oldest, None)
+            self._entries[key] = (count, time.monotonic())
+
+    def refresh_async(self, key, compute):
+        """Schedules compute() for key unless one is already running."""
+        with self._lock:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+
+        def run():
+            try:
+                self.put(key, compute())
+            except Exception as e:
+                print("❌ Count refresh failed:", e)
+            finally:
+                with self._lock:
+                    self._inflight.discard(key)
+
+        self._executor.submit(run)
+
+    def get_or_refresh(self, key, compute):
+        """Cached value (possibly stale) and a background refresh if needed."""
+        count, fresh = self.get(key)
+        if not fresh:
+            self.refresh_async(key, compute)
+        return count, fresh
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
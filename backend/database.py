@@ -1,21 +1,267 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from queue import Queue, Empty, Full
+
 import mysql.connector
 
+import metrics
+
+# ======================================================
+# CONNECTION SETTINGS
+# ======================================================
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "127.0.0.1"),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASSWORD", "2005"),
+    "database": os.getenv("DB_NAME", "library_access"),
+    "connection_timeout": 5,
+    "auth_plugin": "mysql_native_password",
+    "use_pure": True
+}
+
+# ======================================================
+# POOL SETTINGS
+# ======================================================
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN", "2"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))         # seconds to wait for a free connection
+POOL_VALIDATE_AFTER = float(os.getenv("DB_POOL_VALIDATE", "30"))  # ping connections idle longer than this
+
+
+def _open_connection():
+    with metrics.db_connect_latency.time():
+        return mysql.connector.connect(**DB_CONFIG)
+
+
+# ======================================================
+# TIMED CURSOR
+# ======================================================
+class TimedCursor:
+    """Cursor proxy that records execute / executemany time."""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def execute(self, *args, **kwargs):
+        with metrics.db_query_latency.time():
+            return self._raw.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with metrics.db_query_latency.time():
+            return self._raw.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+
+# ======================================================
+# POOLED CONNECTION
+# ======================================================
+class PooledConnection:
+    """
+    Thin proxy around a mysql.connector connection.
+    close() hands the connection back to the pool instead of
+    closing the socket, so existing `conn.close()` calls keep working.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._raw.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __del__(self):
+        # handlers that raise before conn.close() would otherwise leak a slot
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 timeout=POOL_TIMEOUT, validate_after=POOL_VALIDATE_AFTER):
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.validate_after = validate_after
+
+        self._idle = Queue(maxsize=self.max_size)   # (raw_conn, released_at)
+        self._lock = threading.Lock()
+        self._size = 0                               # open connections (idle + borrowed)
+
+    # ---------- internals ----------
+    def _reserve_slot(self):
+        with self._lock:
+            if self._size >= self.max_size:
+                return False
+            self._size += 1
+            return True
+
+    def _free_slot(self):
+        with self._lock:
+            self._size -= 1
+
+    def _create(self):
+        try:
+            return _open_connection()
+        except Exception:
+            self._free_slot()
+            raise
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        self._free_slot()
+
+    def _is_alive(self, raw, released_at):
+        if time.monotonic() - released_at < self.validate_after:
+            return True
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    # ---------- public API ----------
+    def fill(self):
+        """Open connections up to min_size (called once at startup)."""
+        while self._size < self.min_size and self._reserve_slot():
+            self._idle.put((self._create(), time.monotonic()))
+
+    def acquire(self):
+        with metrics.db_acquire_latency.time():
+            return self._acquire()
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                raw, released_at = self._idle.get_nowait()
+            except Empty:
+                if self._reserve_slot():
+                    return PooledConnection(self, self._create())
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a database connection")
+                try:
+                    raw, released_at = self._idle.get(timeout=remaining)
+                except Empty:
+                    raise TimeoutError("Timed out waiting for a database connection")
+
+            if self._is_alive(raw, released_at):
+                return PooledConnection(self, raw)
+
+            # stale socket → drop it and try again
+            self._discard(raw)
+
+    def release(self, raw):
+        try:
+            # half-read unbuffered result (e.g. aborted stream) → unusable
+            if getattr(raw, "unread_result", False):
+                self._discard(raw)
+                return
+            # never hand out an open transaction / stale snapshot
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+
+        try:
+            self._idle.put_nowait((raw, time.monotonic()))
+        except Full:
+            self._discard(raw)
+
+    def close_all(self):
+        while True:
+            try:
+                raw, _ = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(raw)
+
+    def stats(self):
+        return {
+            "size": self._size,
+            "idle": self._idle.qsize(),
+            "in_use": self._size - self._idle.qsize(),
+            "max_size": self.max_size
+        }
+
+
+pool = ConnectionPool()
+
+metrics.GaugeCallback(
+    "db_pool_connections", "Pooled MySQL connections by state.",
+    labels=("state",),
+    fn=lambda: {
+        ("in_use",): pool.stats()["in_use"],
+        ("idle",): pool.stats()["idle"],
+        ("max",): pool.max_size
+    }
+)
+
+
+# ======================================================
+# PUBLIC HELPERS
+# ======================================================
 def get_db_connection():
-    print("\n🔌 Connecting to MySQL...")
     try:
-        conn = mysql.connector.connect(
-            host="127.0.0.1",
-            user="root",
-            password="2005",
-            database="library_access",
-            connection_timeout=5,
-            auth_plugin="mysql_native_password",
-            use_pure=True
-        )
-        print("✅ MySQL Connected Successfully")
-        return conn
-    except mysql.connector.Error as e:
+        return pool.acquire()
+    except (mysql.connector.Error, TimeoutError) as e:
+        metrics.db_connection_errors.inc("timeout" if isinstance(e, TimeoutError) else "mysql")
         print("❌ MySQL Connection Error:", e)
         return None
 
 
+@contextmanager
+def db_connection():
+    """
+    with db_connection() as conn:
+        ...
+    Connection is returned to the pool on exit.
+    Raises instead of returning None.
+    """
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def init_pool():
+    try:
+        pool.fill()
+        print("✅ MySQL pool ready:", pool.stats())
+    except mysql.connector.Error as e:
+        print("❌ MySQL Connection Error:", e)
+
+
+def close_pool():
+    pool.close_all()
@@ -0,0 +1,250 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+
+import metrics
+from database import get_db_connection
+from utils import skip_email_body, open_smtp_session, SENDER_EMAIL, SKIP_EMAIL_SUBJECT, SMTP_TIMEOUT
+
+# ======================================================
+# OUTBOX SETTINGS
+# ======================================================
+WORKER_COUNT = 2
+BATCH_SIZE = 20          # mails sent per claimed batch (one SMTP session)
+POLL_SECONDS = 15        # idle poll; enqueue() wakes workers immediately
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 30        # seconds, doubled per failed attempt
+
+# A claimed batch is leased: once the lease runs out another worker may
+# re-claim it. The lease covers every message (plus the session setup)
+# hitting its worst case, and the sender stops before sending anything
+# it could not finish inside the lease, so a slow batch is never sent
+# twice. MAIL/RCPT/DATA can each wait SMTP_TIMEOUT.
+MESSAGE_WORST_SECONDS = 3 * SMTP_TIMEOUT
+LEASE_SECONDS = (BATCH_SIZE + 1) * MESSAGE_WORST_SECONDS
+
+# ======================================================
+# QUERIES
+# ======================================================
+ENQUEUE_QUERY = """
+    INSERT INTO email_outbox
+    (log_id, to_email, subject, body, status, attempts, next_attempt_at)
+    VALUES (%s, %s, %s, %s, 'PENDING', 0, %s)
+"""
+
+# SENDING rows whose lease ran out are claimed again
+CLAIM_QUERY = """
+    SELECT outbox_id, to_email, subject, body, status, attempts
+    FROM email_outbox
+    WHERE status IN ('PENDING', 'SENDING')
+      AND next_attempt_at <= %s
+    ORDER BY outbox_id
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+
+LEASE_QUERY = """
+    UPDATE email_outbox
+    SET status='SENDING', attempts=%s, next_attempt_at=%s
+    WHERE outbox_id=%s
+"""
+
+SENT_QUERY = """
+    UPDATE email_outbox
+    SET status='SENT', sent_at=%s, last_error=NULL
+    WHERE outbox_id=%s
+"""
+
+RETRY_QUERY = """
+    UPDATE email_outbox
+    SET status=%s, attempts=%s, next_attempt_at=%s, last_error=%s
+    WHERE outbox_id=%s
+"""
+
+# rows the sender skipped because the lease was about to run out
+RELEASE_QUERY = """
+    UPDATE email_outbox
+    SET status='PENDING', next_attempt_at=%s
+    WHERE outbox_id=%s
+"""
+
+
+# ======================================================
+# ENQUEUE (called inside the scan transaction)
+# ======================================================
+def enqueue_skip_email(cur, log_id, teacher_email, teacher_name,
+                       student_name, subject, scan_time):
+    """
+    Writes the alert into email_outbox on the caller's cursor, so it
+    commits (or rolls back) together with the log row.
+    Call notify() after commit to wake a worker.
+    """
+    # plain text: MIMEText encodes it when the worker sends it, and
+    # get_payload() would already be base64 for non-ASCII names
+    body = skip_email_body(teacher_name, student_name, subject, scan_time)
+    cur.execute(ENQUEUE_QUERY, (
+        log_id, teacher_email, SKIP_EMAIL_SUBJECT,
+        body, datetime.now()
+    ))
+
+
+_wakeup = threading.Event()
+_stop = threading.Event()
+_workers = []
+
+
+def notify():
+    _wakeup.set()
+
+
+# ======================================================
+# WORKER
+# ======================================================
+def _claim_batch():
+    """Leases up to BATCH_SIZE due rows. Returns (rows, lease_until)."""
+    conn = get_db_connection()
+    if conn is None:
+        return [], None
+
+    cur = conn.cursor(dictionary=True)
+    now = datetime.now()
+    lease_until = now + timedelta(seconds=LEASE_SECONDS)
+    try:
+        cur.execute(CLAIM_QUERY, (now, BATCH_SIZE))
+        claimed = []
+        leases = []
+        expired = []
+        for r in cur.fetchall():
+            if r["status"] == "SENDING":
+                # the worker holding it died or hung: that was an attempt
+                r["attempts"] += 1
+                if r["attempts"] >= MAX_ATTEMPTS:
+                    expired.append(("FAILED", r["attempts"], now, "Lease expired", r["outbox_id"]))
+                    continue
+            leases.append((r["attempts"], lease_until, r["outbox_id"]))
+            claimed.append(r)
+
+        if leases:
+            cur.executemany(LEASE_QUERY, leases)
+        if expired:
+            cur.executemany(RETRY_QUERY, expired)
+        conn.commit()
+        return claimed, lease_until
+    except Exception as e:
+        conn.rollback()
+        print("❌ Outbox claim failed:", e)
+        return [], None
+    finally:
+        conn.close()
+
+
+# _send_batch result for a row it did not try (lease nearly over)
+NOT_SENT = object()
+
+
+def _finish(results):
+    """results: [(outbox_id, attempts, None | error | NOT_SENT)]"""
+    conn = get_db_connection()
+    if conn is None:
+        return
+
+    cur = conn.cursor()
+    now = datetime.now()
+
+    sent = []
+    released = []
+    failed = []
+    for oid, attempts, err in results:
+        if err is None:
+            sent.append((now, oid))
+        elif err is NOT_SENT:
+            released.append((now, oid))
+        else:
+            attempts += 1
+            status = "FAILED" if attempts >= MAX_ATTEMPTS else "PENDING"
+            retry_at = now + timedelta(seconds=BACKOFF_BASE * (2 ** (attempts - 1)))
+            failed.append((status, attempts, retry_at, str(err)[:255], oid))
+
+    try:
+        if sent:
+            cur.executemany(SENT_QUERY, sent)
+        if released:
+            cur.executemany(RELEASE_QUERY, released)
+        if failed:
+            cur.executemany(RETRY_QUERY, failed)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _send_batch(rows, lease_until):
+    results = []
+    try:
+        server = open_smtp_session()
+    except Exception as e:
+        return [(r["outbox_id"], r["attempts"], e) for r in rows]
+
+    # last moment a message may start and still finish inside the lease
+    send_by = lease_until - timedelta(seconds=MESSAGE_WORST_SECONDS)
+    try:
+        for r in rows:
+            if datetime.now() > send_by:
+                results.append((r["outbox_id"], r["attempts"], NOT_SENT))
+                continue
+            msg = MIMEText(r["body"])
+            msg["Subject"] = r["subject"]
+            msg["From"] = SENDER_EMAIL
+            msg["To"] = r["to_email"]
+            started = time.perf_counter()
+            try:
+                server.send_message(msg)
+                metrics.smtp_latency.observe(time.perf_counter() - started, "sent")
+                results.append((r["outbox_id"], r["attempts"], None))
+            except Exception as e:
+                metrics.smtp_latency.observe(time.perf_counter() - started, "failed")
+                results.append((r["outbox_id"], r["attempts"], e))
+    finally:
+        try:
+            server.quit()
+        except Exception:
+            pass
+    return results
+
+
+def run_once():
+    """Claims and sends one batch. Returns the number of rows processed."""
+    rows, lease_until = _claim_batch()
+    if not rows:
+        return 0
+    _finish(_send_batch(rows, lease_until))
+    return len(rows)
+
+
+def _worker_loop():
+    while not _stop.is_set():
+        try:
+            if run_once():
+                continue
+        except Exception as e:
+            print("❌ Outbox worker error:", e)
+        _wakeup.wait(POLL_SECONDS)
+        _wakeup.clear()
+
+
+def start():
+    if _workers:
+        return
+    _stop.clear()
+    for i in range(WORKER_COUNT):
+        t = threading.Thread(target=_worker_loop, name=f"email-outbox-{i}", daemon=True)
+        t.start()
+        _workers.append(t)
+
+
+def stop():
+    _stop.set()
+    _wakeup.set()
+    for t in _workers:
+        t.join(timeout=5)
+    _workers.clear()
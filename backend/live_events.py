@@ -0,0 +1,84 @@
+import asyncio
+import json
+import threading
+
+import occupancy
+
+# ======================================================
+# LIVE EVENT BROADCASTER (Server-Sent Events)
+# ======================================================
+# Scan handlers run in FastAPI's threadpool; each SSE client owns an
+# asyncio.Queue on the event loop. publish() hands events across with
+# call_soon_threadsafe, so writers never block on slow readers.
+# Subscribers live in this process only: with several uvicorn workers a
+# dashboard sees just the scans its own worker handled. Live updates
+# need a single worker (see README), or a fan-out through a broker.
+
+QUEUE_SIZE = 200
+
+_subscribers = set()        # {(loop, queue)}
+_lock = threading.Lock()
+
+
+def subscribe():
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    with _lock:
+        _subscribers.add((loop, queue))
+    return loop, queue
+
+
+def unsubscribe(sub):
+    with _lock:
+        _subscribers.discard(sub)
+
+
+def _offer(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # slow client: drop the event, it will resync on reconnect
+        pass
+
+
+def publish(event_type, data):
+    message = f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+    with _lock:
+        subscribers = list(_subscribers)
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(_offer, queue, message)
+        except RuntimeError:
+            # loop already closed
+            unsubscribe((loop, queue))
+
+
+def subscriber_count():
+    return len(_subscribers)
+
+
+def publish_log(log_id, user_id, name, role, department,
+                action, status, matched_subject, scan_time):
+    """One committed log row + the counter deltas it causes."""
+    if not _subscribers:
+        return
+    publish("scan", {
+        "log": {
+            "log_id": log_id,
+            "user_id": user_id,
+            "name": name,
+            "role": role,
+            "department": department,
+            "action": action,
+            "status": status,
+            "matched_subject": matched_subject,
+            "scan_time": scan_time
+        },
+        "delta": {
+            "entries": 1 if action == "ENTRY" else 0,
+            "exits": 1 if action == "EXIT" else 0,
+            "skips": 1 if status == "SKIP" else 0,
+            "logs": 1
+        },
+        "occupancy": occupancy.snapshot()
+    })
@@ -1,7 +1,16 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from routers import auth, scan, logs, dashboard, members,timetable,academic_calendar
+from routers import auth, scan, logs, dashboard, members,timetable,academic_calendar, events
+from routers import metrics as metrics_router
+from database import init_pool, close_pool
+from session_tokens import require_admin
+from metrics import MetricsMiddleware
+import member_directory
+import timetable_index
+import calendar_index
+import email_outbox
+import occupancy
 
 app = FastAPI()
 
@@ -13,14 +22,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# include all router files
+# outermost, so it sees the final status of every request
+app.add_middleware(MetricsMiddleware)
+
+# include all router files (admin APIs need a session token from /admin/login)
+admin_only = [Depends(require_admin)]
+
 app.include_router(auth.router)
 app.include_router(scan.router)
-app.include_router(logs.router)
-app.include_router(dashboard.router)
-app.include_router(members.router)
-app.include_router(timetable.router)
-app.include_router(academic_calendar.router)
+app.include_router(logs.router, dependencies=admin_only)
+app.include_router(dashboard.router, dependencies=admin_only)
+app.include_router(members.router, dependencies=admin_only)
+app.include_router(timetable.router, dependencies=admin_only)
+app.include_router(academic_calendar.router, dependencies=admin_only)
+app.include_router(events.router, dependencies=admin_only)
+app.include_router(metrics_router.router)
+
+@app.on_event("startup")
+def startup():
+    init_pool()
+    member_directory.load()
+    timetable_index.rebuild()
+    calendar_index.rebuild()
+    email_outbox.start()
+    occupancy.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    occupancy.stop()
+    email_outbox.stop()
+    close_pool()
+
 
 @app.get("/")
 def home():
@@ -0,0 +1,255 @@
+import threading
+from background_refresh import BackgroundRefresh
+from database import get_db_connection
+from utils import normalize_text
+import member_search
+
+
+# ======================================================
+# MEMBER RECORD
+# ======================================================
+class MemberRecord:
+    __slots__ = (
+        "member_id", "role", "name", "department",
+        "year", "division", "batch", "email"
+    )
+
+    def __init__(self, member_id, role, name, department,
+                 year=None, division=None, batch=None, email=None):
+        self.member_id = member_id
+        self.role = role
+        self.name = name
+        self.department = department
+        self.year = year
+        self.division = division
+        self.batch = batch
+        self.email = email
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+TEACHER_COLUMNS = "teacher_id AS member_id, name, department, email"
+STUDENT_COLUMNS = "student_id AS member_id, name, department, year, division, batch, email"
+
+
+def _record(role, row):
+    return MemberRecord(
+        member_id=normalize_text(row["member_id"], "upper"),
+        role=role,
+        name=row["name"],
+        department=row["department"],
+        year=row.get("year"),
+        division=row.get("division"),
+        batch=row.get("batch"),
+        email=row.get("email")
+    )
+
+
+# ======================================================
+# DIRECTORY (process-local, keyed by normalized ID)
+# ======================================================
+# Reloaded in full every REFRESH_SECONDS on a background thread, which
+# is how edits and deactivations made through another worker reach this
+# one. put()/remove() made while a reload is reading are journaled and
+# replayed onto the new map, so the swap cannot undo them.
+# A teacher entry shadows a student with the same ID (matches scan
+# order); the student is kept aside so removing the teacher brings it
+# back.
+REFRESH_SECONDS = 120
+
+_lock = threading.Lock()
+
+
+class _Members(dict):
+    """member_id -> MemberRecord, plus the students hidden by a teacher."""
+
+    def __init__(self):
+        super().__init__()
+        self.shadowed = {}
+
+
+class _Directory(BackgroundRefresh):
+    def __init__(self):
+        super().__init__("member-directory", _load, REFRESH_SECONDS)
+        self.value = _Members()
+        self.loaded = False
+        self.journal = None     # [(fn, args)] while a reload is reading
+
+    def swap(self, members):
+        with _lock:
+            for fn, args in self.journal or ():
+                fn(members, *args)
+            self.journal = None
+            self.value = members
+            self.loaded = True
+            member_search.rebuild(members.values())
+
+
+def _read_all():
+    conn = get_db_connection()
+    if conn is None:
+        return None
+
+    members = _Members()
+    try:
+        cur = conn.cursor(dictionary=True)
+
+        cur.execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE active=1")
+        for row in cur.fetchall():
+            rec = _record("student", row)
+            members[rec.member_id] = rec
+
+        cur.execute(f"SELECT {TEACHER_COLUMNS} FROM teachers WHERE active=1")
+        for row in cur.fetchall():
+            rec = _record("teacher", row)
+            shadowed = members.get(rec.member_id)
+            if shadowed is not None:
+                members.shadowed[rec.member_id] = shadowed
+            members[rec.member_id] = rec
+    finally:
+        conn.close()
+    return members
+
+
+def _load():
+    with _lock:
+        _directory.journal = []
+    members = None
+    try:
+        members = _read_all()
+    finally:
+        if members is None:
+            with _lock:
+                _directory.journal = None
+    return members
+
+
+_directory = _Directory()
+
+
+def load():
+    """Blocking full reload from students + teachers. Called at startup."""
+    return _directory.rebuild()
+
+
+def invalidate():
+    """Schedule a full reload; lookups keep using the current map meanwhile."""
+    _directory.invalidate()
+
+
+def is_loaded():
+    return _directory.loaded
+
+
+def get(member_id):
+    """Memory-only lookup."""
+    return _directory.value.get(normalize_text(member_id, "upper"))
+
+
+def lookup(member_id, cur=None):
+    """
+    Memory lookup with a DB fallback on miss, so members written by
+    another worker process are still found (and cached here).
+    `cur` is an optional dictionary cursor to reuse. Never reloads
+    inline: a due reload runs in the background.
+    """
+    member_id = normalize_text(member_id, "upper")
+
+    rec = _directory.get().get(member_id)
+    if rec is not None:
+        return rec
+
+    rec = _fetch(member_id, cur)
+    if rec is not None:
+        _patch(_put, rec)
+    return rec
+
+
+def _fetch(member_id, cur=None):
+    conn = None
+    if cur is None:
+        conn = get_db_connection()
+        if conn is None:
+            return None
+        cur = conn.cursor(dictionary=True)
+
+    try:
+        cur.execute(f"SELECT {TEACHER_COLUMNS} FROM teachers WHERE teacher_id=%s AND active=1 LIMIT 1", (member_id,))
+        row = cur.fetchone()
+        if row:
+            return _record("teacher", row)
+
+        cur.execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE student_id=%s AND active=1 LIMIT 1", (member_id,))
+        row = cur.fetchone()
+        return _record("student", row) if row else None
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+# ======================================================
+# INCREMENTAL PATCHES (called by routers/members.py)
+# ======================================================
+def _put(members, rec):
+    existing = members.get(rec.member_id)
+    if existing is not None and existing.role == "teacher" and rec.role == "student":
+        members.shadowed[rec.member_id] = rec
+        return existing
+    if existing is not None and existing.role == "student" and rec.role == "teacher":
+        members.shadowed[rec.member_id] = existing
+    members[rec.member_id] = rec
+    member_search.add(rec)
+    return rec
+
+
+def _remove(members, member_id, role):
+    existing = members.get(member_id)
+    if existing is None:
+        return
+    if role is not None and existing.role != role:
+        if role == "student":
+            members.shadowed.pop(member_id, None)
+        return
+
+    del members[member_id]
+    member_search.remove(member_id)
+    restored = members.shadowed.pop(member_id, None)
+    if restored is not None:
+        members[member_id] = restored
+        member_search.add(restored)
+
+
+def _patch(fn, *args):
+    """Applies fn to the live map (and the journal of a running reload)."""
+    with _lock:
+        if _directory.journal is not None:
+            _directory.journal.append((fn, args))
+        return fn(_directory.value, *args)
+
+
+def put(role, member_id, name, department,
+        year=None, division=None, batch=None, email=None):
+    rec = MemberRecord(
+        member_id=normalize_text(member_id, "upper"),
+        role=role,
+        name=name,
+        department=department,
+        year=year,
+        division=division,
+        batch=batch,
+        email=email
+    )
+    return _patch(_put, rec)
+
+
+def remove(member_id, role=None):
+    _patch(_remove, normalize_text(member_id, "upper"), role)
+
+
+def stats():
+    return {
+        "loaded": _directory.loaded,
+        "members": len(_directory.value),
+        "stale": _directory.is_stale()
+    }
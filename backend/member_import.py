@@ -0,0 +1,320 @@
+from batch_writer import BATCH_SIZE, write_batch
+from utils import normalize_text
+
+DIFF_SAMPLE = 100     # IDs returned per diff list; the counts are always exact
+
+# ======================================================
+# ROLE LAYOUT
+# ======================================================
+ROLE_SPECS = {
+    "student": {
+        "table": "students",
+        "id_col": "student_id",
+        "columns": ["student_id", "name", "department", "year", "division", "batch", "email", "contact_no"],
+        "normalize": {
+            "student_id": "upper",
+            "department": "upper",
+            "year": "upper",
+            "division": "upper",
+            "batch": "upper",
+            "email": "lower"
+        }
+    },
+    "teacher": {
+        "table": "teachers",
+        "id_col": "teacher_id",
+        "columns": ["teacher_id", "name", "department", "email", "contact_no", "designation"],
+        "normalize": {
+            "teacher_id": "upper",
+            "department": "upper",
+            "email": "lower",
+            "designation": "title"
+        }
+    }
+}
+
+
+def normalize_row(spec, row):
+    """CSV dict → tuple in column order. Raises ValueError with a reason."""
+    values = []
+    for col in spec["columns"]:
+        if col not in row:
+            raise ValueError(f"Missing column: {col}")
+        value = row[col]
+        mode = spec["normalize"].get(col)
+        if mode:
+            value = normalize_text(value, mode)
+        elif isinstance(value, str):
+            value = value.strip()
+        values.append(value)
+
+    if not values[0]:
+        raise ValueError(f"Missing {spec['id_col']}")
+    return tuple(values)
+
+
+# ======================================================
+# BULK IMPORT
+# ======================================================
+def existing_ids(cur, spec, ids):
+    """Set of ids already in the table (one IN query per chunk)."""
+    found = set()
+    ids = list(ids)
+    for i in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[i:i + BATCH_SIZE]
+        placeholders = ",".join(["%s"] * len(chunk))
+        cur.execute(
+            f"SELECT {spec['id_col']} FROM {spec['table']} WHERE {spec['id_col']} IN ({placeholders})",
+            chunk
+        )
+        found.update(normalize_text(r[0], "upper") for r in cur.fetchall())
+    return found
+
+
+def _insert_query(spec):
+    cols = spec["columns"]
+    return f"""
+        INSERT INTO {spec['table']}
+        ({", ".join(cols)})
+        VALUES ({",".join(["%s"] * len(cols))})
+    """
+
+
+def _upsert_query(spec):
+    # one multi-row statement per executemany; also reactivates
+    cols = spec["columns"]
+    updates = ", ".join(f"{c}=VALUES({c})" for c in cols[1:])
+    return f"""
+        INSERT INTO {spec['table']}
+        ({", ".join(cols)})
+        VALUES ({",".join(["%s"] * len(cols))})
+        ON DUPLICATE KEY UPDATE {updates}, active=1
+    """
+
+
+def _error_id(values):
+    return {"id": values[0]}
+
+
+def _parse_rows(spec, rows, first_line, errors):
+    """
+    Yields (line_no, values) for valid rows, in chunks of BATCH_SIZE.
+    Invalid / repeated rows go to `errors`.
+    """
+    pending = []
+    seen = set()
+
+    for line_no, row in enumerate(rows, start=first_line):
+        try:
+            values = normalize_row(spec, row)
+        except ValueError as e:
+            errors.append({"row": line_no, "id": row.get(spec["id_col"]), "reason": str(e)})
+            continue
+
+        if values[0] in seen:
+            errors.append({"row": line_no, "id": values[0], "reason": "Duplicate ID in file"})
+            continue
+        seen.add(values[0])
+
+        pending.append((line_no, values))
+        if len(pending) >= BATCH_SIZE:
+            yield pending
+            pending = []
+
+    if pending:
+        yield pending
+
+
+def _sample(target, done, id_col):
+    for row in done:
+        if len(target) >= DIFF_SAMPLE:
+            break
+        target.append(row[id_col])
+
+
+def import_members(cur, role, rows, first_line=2, on_chunk=None):
+    """
+    Inserts new members from an iterable of CSV dict rows.
+    Existing / repeated IDs are skipped.
+
+    After each written chunk, on_chunk(upserted, deactivated_ids) gets
+    that chunk's rows as column dicts; the caller commits there and
+    updates its caches, so nothing here grows with the file. The caller
+    commits whatever follows the last chunk.
+
+    Returns {
+        "added", "skipped",
+        "errors": [{"row", "id", "reason"}],
+        "sample": {"added": [id]}       # first DIFF_SAMPLE ids
+    }
+    """
+    spec = ROLE_SPECS[role]
+    query = _insert_query(spec)
+    errors = []
+    added = 0
+    sample = {"added": []}
+
+    for chunk in _parse_rows(spec, rows, first_line, errors):
+        present = existing_ids(cur, spec, {values[0] for _, values in chunk})
+        fresh = []
+        for line_no, values in chunk:
+            if values[0] in present:
+                errors.append({"row": line_no, "id": values[0], "reason": "Already exists"})
+            else:
+                fresh.append((line_no, values))
+        if not fresh:
+            continue
+
+        done = [
+            dict(zip(spec["columns"], values))
+            for _, values in write_batch(cur, query, fresh, errors, _error_id)
+        ]
+        added += len(done)
+        _sample(sample["added"], done, spec["id_col"])
+        if on_chunk is not None:
+            on_chunk(done, [])
+
+    errors.sort(key=lambda e: e["row"])
+
+    return {
+        "added": added,
+        "skipped": len(errors),
+        "errors": errors,
+        "sample": sample
+    }
+
+
+# ======================================================
+# ROSTER SYNC
+# ======================================================
+def existing_rows(cur, spec, ids):
+    """{id: (values tuple, active)} for ids already in the table."""
+    cols = spec["columns"]
+    found = {}
+    ids = list(ids)
+    for i in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[i:i + BATCH_SIZE]
+        placeholders = ",".join(["%s"] * len(chunk))
+        cur.execute(
+            f"SELECT {', '.join(cols)}, active FROM {spec['table']} "
+            f"WHERE {spec['id_col']} IN ({placeholders})",
+            chunk
+        )
+        for r in cur.fetchall():
+            found[normalize_text(r[0], "upper")] = (tuple(r[:-1]), bool(r[-1]))
+    return found
+
+
+def _same(old, new):
+    # NULL and '' are the same value in a roster CSV
+    return all((a or "") == (b or "") for a, b in zip(old[1:], new[1:]))
+
+
+def _deactivate_missing(cur, spec, keep_ids, departments, on_chunk=None):
+    """
+    Sets active=0 for active members of `departments` not in keep_ids.
+    Returns (count, first DIFF_SAMPLE ids).
+    """
+    if not departments:
+        return 0, []
+
+    placeholders = ",".join(["%s"] * len(departments))
+    cur.execute(
+        f"SELECT {spec['id_col']} FROM {spec['table']} "
+        f"WHERE active=1 AND department IN ({placeholders})",
+        list(departments)
+    )
+    missing = [
+        r[0] for r in cur.fetchall()
+        if normalize_text(r[0], "upper") not in keep_ids
+    ]
+
+    for i in range(0, len(missing), BATCH_SIZE):
+        chunk = missing[i:i + BATCH_SIZE]
+        cur.execute(
+            f"UPDATE {spec['table']} SET active=0 "
+            f"WHERE {spec['id_col']} IN ({','.join(['%s'] * len(chunk))})",
+            chunk
+        )
+        if on_chunk is not None:
+            on_chunk([], chunk)
+    return len(missing), missing[:DIFF_SAMPLE]
+
+
+def sync_members(cur, role, rows, deactivate_missing=False, first_line=2, on_chunk=None):
+    """
+    Makes the table match an uploaded roster: new IDs are inserted,
+    changed or inactive ones are upserted, identical ones are left alone.
+    With deactivate_missing, active members of the departments in the
+    file who are absent from it are set active=0. on_chunk works as in
+    import_members (deactivations arrive as deactivated_ids).
+
+    Returns {
+        "added", "updated", "unchanged", "deactivated", "skipped",
+        "errors": [{"row", "id", "reason"}],
+        "sample": {"added": [id], "updated": [id], "deactivated": [id]}
+    }
+    """
+    spec = ROLE_SPECS[role]
+    insert_query = _insert_query(spec)
+    upsert_query = _upsert_query(spec)
+    dept_pos = spec["columns"].index("department")
+
+    errors = []
+    added = updated = unchanged = 0
+    sample = {"added": [], "updated": [], "deactivated": []}
+    keep_ids = set()        # only filled for deactivate_missing
+    departments = set()
+
+    def write(query, batch):
+        if not batch:
+            return []
+        return [
+            dict(zip(spec["columns"], values))
+            for _, values in write_batch(cur, query, batch, errors, _error_id)
+        ]
+
+    for chunk in _parse_rows(spec, rows, first_line, errors):
+        current = existing_rows(cur, spec, {values[0] for _, values in chunk})
+        fresh = []
+        stale = []
+        for line_no, values in chunk:
+            if deactivate_missing:
+                keep_ids.add(values[0])
+                if values[dept_pos]:
+                    departments.add(values[dept_pos])
+
+            old = current.get(values[0])
+            if old is None:
+                fresh.append((line_no, values))
+            elif not old[1] or not _same(old[0], values):
+                stale.append((line_no, values))
+            else:
+                unchanged += 1
+
+        inserted = write(insert_query, fresh)
+        changed = write(upsert_query, stale)
+        added += len(inserted)
+        updated += len(changed)
+        _sample(sample["added"], inserted, spec["id_col"])
+        _sample(sample["updated"], changed, spec["id_col"])
+        if on_chunk is not None and (inserted or changed):
+            on_chunk(inserted + changed, [])
+
+    deactivated = 0
+    if deactivate_missing:
+        deactivated, sample["deactivated"] = _deactivate_missing(
+            cur, spec, keep_ids, departments, on_chunk
+        )
+
+    errors.sort(key=lambda e: e["row"])
+
+    return {
+        "added": added,
+        "updated": updated,
+        "unchanged": unchanged,
+        "deactivated": deactivated,
+        "skipped": len(errors),
+        "errors": errors,
+        "sample": sample
+    }
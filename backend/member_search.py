@@ -0,0 +1,196 @@
+import heapq
+import threading
+
+
+# ======================================================
+# MEMBER SEARCH INDEX
+# ======================================================
+# Type-ahead over the member directory without touching MySQL:
+#   IDs   → prefix trie, walked in order so a prefix stops at `limit`
+#   names → trigram postings; every word is padded with two spaces so
+#           1-2 character queries still match word starts
+# Maintained by member_directory (load / put / remove).
+
+
+class _TrieNode:
+    __slots__ = ("children", "member_id")
+
+    def __init__(self):
+        self.children = {}
+        self.member_id = None     # set when a key ends here
+
+
+class PrefixTrie:
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def add(self, key, member_id):
+        node = self.root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+        node.member_id = member_id
+
+    def discard(self, key, member_id):
+        node = self.root
+        path = []
+        for ch in key:
+            child = node.children.get(ch)
+            if child is None:
+                return
+            path.append((node, ch, child))
+            node = child
+        if node.member_id == member_id:
+            node.member_id = None
+        # prune empty branches
+        for parent, ch, child in reversed(path):
+            if child.member_id is not None or child.children:
+                break
+            del parent.children[ch]
+
+    def _node(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def iter_sorted(self, prefix):
+        """Keys under prefix in lexicographic order (lazy, so callers can stop early)."""
+        node = self._node(prefix)
+        if node is None:
+            return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.member_id is not None:
+                yield node.member_id
+            stack.extend(node.children[ch] for ch in sorted(node.children, reverse=True))
+
+
+def trigrams(text):
+    grams = set()
+    for word in text.lower().split():
+        padded = "  " + word
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def _query_grams(query):
+    grams = set()
+    for word in query.lower().split():
+        if len(word) < 3:
+            grams.add(("  " + word)[-3:])
+        else:
+            grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+_lock = threading.Lock()
+_records = {}          # member_id -> MemberRecord
+_id_trie = PrefixTrie()
+_name_grams = {}       # trigram -> {member_id}
+
+
+def _index(rec):
+    _records[rec.member_id] = rec
+    _id_trie.add(rec.member_id, rec.member_id)
+    for gram in trigrams(rec.name or ""):
+        _name_grams.setdefault(gram, set()).add(rec.member_id)
+
+
+def _unindex(member_id):
+    rec = _records.pop(member_id, None)
+    if rec is None:
+        return
+    _id_trie.discard(member_id, member_id)
+    for gram in trigrams(rec.name or ""):
+        ids = _name_grams.get(gram)
+        if ids is not None:
+            ids.discard(member_id)
+            if not ids:
+                del _name_grams[gram]
+
+
+def rebuild(records):
+    global _records, _id_trie, _name_grams
+    with _lock:
+        _records, _id_trie, _name_grams = {}, PrefixTrie(), {}
+        for rec in records:
+            _index(rec)
+
+
+def add(rec):
+    with _lock:
+        _unindex(rec.member_id)
+        _index(rec)
+
+
+def remove(member_id):
+    with _lock:
+        _unindex(member_id)
+
+
+def _name_matches(query):
+    grams = _query_grams(query)
+    if not grams:
+        return set()
+    postings = sorted((_name_grams.get(g, set()) for g in grams), key=len)
+    if not postings[0]:
+        return set()
+    candidates = set(postings[0])
+    for ids in postings[1:]:
+        candidates &= ids
+        if not candidates:
+            break
+    # trigrams can match out of order; confirm on the real name
+    words = query.lower().split()
+    return {
+        m for m in candidates
+        if all(w in (_records[m].name or "").lower() for w in words)
+    }
+
+
+def search(query, role=None, limit=10):
+    """
+    Ranked matches for a partial ID or name: ID prefix matches in ID
+    order (an exact ID sorts first), then name matches, word starts
+    before substrings.
+    """
+    query = (query or "").strip()
+    if not query:
+        return []
+
+    def wanted(member_id):
+        return role is None or _records[member_id].role == role
+
+    with _lock:
+        hits = []
+        for member_id in _id_trie.iter_sorted(query.upper()):
+            if wanted(member_id):
+                hits.append(member_id)
+                if len(hits) >= limit:
+                    return [_records[m] for m in hits]
+
+        q_lower = query.lower()
+        taken = set(hits)
+
+        def rank(member_id):
+            name = (_records[member_id].name or "").lower()
+            word_start = name.startswith(q_lower) or (" " + q_lower) in name
+            return (not word_start, name, member_id)
+
+        by_name = (
+            m for m in _name_matches(query)
+            if m not in taken and wanted(m)
+        )
+        hits.extend(heapq.nsmallest(limit - len(hits), by_name, key=rank))
+        return [_records[m] for m in hits]
+
+
+def stats():
+    return {
+        "members": len(_records),
+        "trigrams": len(_name_grams)
+    }
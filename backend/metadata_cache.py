@@ -0,0 +1,118 @@
+import hashlib
+import json
+
+from fastapi import Response
+from background_refresh import BackgroundRefresh
+from database import get_db_connection
+
+TTL_SECONDS = 300
+
+
+# ======================================================
+# FACET INDEX
+# ======================================================
+# Every filter/metadata endpoint is a projection of these three sets,
+# loaded with three DISTINCT queries on one connection. Member and
+# timetable writes call invalidate(); the TTL covers other workers.
+#   students:  {(department, year, division, batch)}
+#   teachers:  {department}
+#   timetable: {(department, year, division, batch)}
+
+
+def _load():
+    conn = get_db_connection()
+    if conn is None:
+        return None
+
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT DISTINCT department, year, division, batch FROM students WHERE active=1")
+        students = set(cur.fetchall())
+
+        cur.execute("SELECT DISTINCT department FROM teachers WHERE active=1")
+        teachers = {r[0] for r in cur.fetchall()}
+
+        cur.execute("SELECT DISTINCT department, year, division, batch FROM timetable")
+        timetable = set(cur.fetchall())
+    finally:
+        conn.close()
+
+    return {"students": students, "teachers": teachers, "timetable": timetable}
+
+
+# filter endpoints wait for a due reload so an admin sees their own edit
+_facets = BackgroundRefresh("metadata-facets", _load, TTL_SECONDS)
+
+
+def facets():
+    return _facets.get(wait=True) or {"students": set(), "teachers": set(), "timetable": set()}
+
+
+def invalidate():
+    _facets.invalidate()
+
+
+def _match(value, wanted):
+    # MySQL's default collation compares case-insensitively
+    return not wanted or (value or "").upper() == wanted.upper()
+
+
+def _sorted(values):
+    # same order as ORDER BY: NULL first
+    return sorted(set(values), key=lambda v: (v is not None, v or ""))
+
+
+# ======================================================
+# PROJECTIONS
+# ======================================================
+def student_values(field, department=None, year=None, division=None):
+    pos = {"department": 0, "year": 1, "division": 2, "batch": 3}[field]
+    rows = facets()["students"]
+    return _sorted(
+        r[pos] for r in rows
+        if _match(r[0], department)
+        and _match(r[1], year)
+        and _match(r[2], division)
+    )
+
+
+def teacher_departments():
+    return _sorted(facets()["teachers"])
+
+
+def all_departments():
+    return _sorted(set(student_values("department")) | set(teacher_departments()))
+
+
+def timetable_values(field, department=None, year=None, division=None):
+    pos = {"department": 0, "year": 1, "division": 2, "batch": 3}[field]
+    rows = facets()["timetable"]
+    return _sorted(
+        r[pos] for r in rows
+        if _match(r[0], department)
+        and _match(r[1], year)
+        and _match(r[2], division)
+    )
+
+
+# ======================================================
+# CONDITIONAL GET (ETag / 304)
+# ======================================================
+def render(data):
+    """JSON body + its ETag, so callers can cache both."""
+    body = json.dumps(data, default=str, separators=(",", ":"))
+    etag = '"' + hashlib.md5(body.encode()).hexdigest() + '"'
+    return body, etag
+
+
+def etag_response(request, data):
+    return rendered_response(request, *render(data))
+
+
+def rendered_response(request, body, etag):
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if request is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
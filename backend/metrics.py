@@ -0,0 +1,224 @@
+import threading
+import time
+from bisect import bisect_left
+
+# ======================================================
+# METRICS (Prometheus text format, no client library)
+# ======================================================
+# Counters and histograms are process-local and keyed by label values.
+# GET /metrics renders everything registered here, plus gauges whose
+# value is read at scrape time (pool utilization).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+_registry = []
+_lock = threading.Lock()
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with _lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            items = sorted(self._values.items())
+        for values, count in items:
+            lines.append(f"{self.name}{_labels(self.label_names, values)} {_fmt(count)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}       # label values -> [bucket counts..., sum, count]
+        _registry.append(self)
+
+    def observe(self, seconds, *label_values):
+        i = bisect_left(self.buckets, seconds)
+        with _lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def time(self, *label_values):
+        return _Timer(self, label_values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for values, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                labels = _labels(self.label_names + ("le",), values + (_fmt(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.label_names + ("le",), values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            base = _labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{base} {_fmt(series[-2])}")
+            lines.append(f"{self.name}_count{base} {series[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "started")
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+
+
+class GaugeCallback:
+    """Gauge read at scrape time: fn() → {label value tuple: number}."""
+
+    def __init__(self, name, help_text, labels, fn):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.fn = fn
+        _registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.fn()
+        except Exception:
+            return lines
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_fmt(value)}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ======================================================
+# APPLICATION METRICS
+# ======================================================
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by router, method and status.",
+    labels=("router", "method", "status")
+)
+http_latency = Histogram(
+    "http_request_duration_seconds", "Time to response start, per router.",
+    labels=("router",)
+)
+db_query_latency = Histogram(
+    "db_query_duration_seconds", "cursor.execute / executemany round trips.",
+    buckets=DB_BUCKETS
+)
+db_connect_latency = Histogram(
+    "db_connection_open_seconds", "Time to open a new MySQL connection.",
+    buckets=DB_BUCKETS
+)
+db_acquire_latency = Histogram(
+    "db_pool_acquire_seconds", "Time waiting for a pooled connection.",
+    buckets=DB_BUCKETS
+)
+db_connection_errors = Counter(
+    "db_connection_errors_total", "Failed connection acquires (MySQL error or pool timeout).",
+    labels=("reason",)
+)
+smtp_latency = Histogram(
+    "smtp_send_duration_seconds", "Time per SMTP message send.",
+    labels=("result",)
+)
+logs_written = Counter(
+    "attendance_logs_total", "Committed log rows by action (ENTRY/EXIT) and status (NORMAL/SKIP).",
+    labels=("action", "status")
+)
+
+
+def record_log(action, status):
+    """Call after the log row is committed."""
+    logs_written.inc(action, status or "NORMAL")
+
+
+# ======================================================
+# ASGI MIDDLEWARE (per-router request count + latency)
+# ======================================================
+class MetricsMiddleware:
+    """
+    Times each HTTP request up to the response start and labels it with
+    the router module that served it (routers/logs.py → "logs").
+    Streaming responses (CSV export, SSE) count until headers are sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500, "done": False}
+
+        def finish():
+            if status["done"]:
+                return
+            status["done"] = True
+            endpoint = scope.get("endpoint")
+            module = getattr(endpoint, "__module__", "") or ""
+            router = module.rsplit(".", 1)[-1] if module.startswith("routers.") else (
+                "app" if endpoint is not None else "unmatched"
+            )
+            http_latency.observe(time.perf_counter() - started, router)
+            http_requests.inc(router, scope.get("method", ""), str(status["code"]))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                finish()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
@@ -0,0 +1,170 @@
+import threading
+from collections import Counter
+from datetime import date
+
+from database import get_db_connection
+from query_builder import day_range
+
+RECONCILE_SECONDS = 300
+
+
+# ======================================================
+# LIVE OCCUPANCY
+# ======================================================
+# Who is inside right now: members whose latest action today is ENTRY.
+# Updated in memory on every committed scan / manual entry and
+# reconciled against member_presence (which mirrors logs) periodically
+# and at midnight, so a missed EXIT does not count forever.
+# The counters are per process: with several uvicorn workers each one
+# only sees its own scans between reconciles, so run the API as a single
+# worker for exact live counts (see README).
+
+RECONCILE_QUERY = """
+    SELECT
+        p.user_id,
+        COALESCE(t.department, s.department, '') AS department,
+        CASE WHEN t.teacher_id IS NOT NULL THEN 'teacher' ELSE 'student' END AS role
+    FROM member_presence p
+    LEFT JOIN teachers t ON t.teacher_id = p.user_id
+    LEFT JOIN students s ON s.student_id = p.user_id
+    WHERE p.last_action = 'ENTRY'
+      AND p.last_scan_time >= %s
+"""
+
+_lock = threading.Lock()
+_inside = {}                 # user_id -> (department, role)
+_by_group = Counter()        # (department, role) -> count
+_day = date.today()
+_journal = None              # events seen while a reconcile is running
+
+_stop = threading.Event()
+_thread = None
+
+
+def _apply(user_id, action, department, role):
+    key = (department or "", role)
+    if action == "ENTRY":
+        if user_id not in _inside:
+            _inside[user_id] = key
+            _by_group[key] += 1
+    elif action == "EXIT":
+        old = _inside.pop(user_id, None)
+        if old is not None:
+            _by_group[old] -= 1
+            if _by_group[old] <= 0:
+                del _by_group[old]
+
+
+def record(user_id, action, department, role):
+    """Call after the log row is committed."""
+    with _lock:
+        if _day != date.today():
+            _reset_for_new_day()
+        _apply(user_id, action, department, role)
+        if _journal is not None:
+            _journal.append((user_id, action, department, role))
+
+
+def _reset_for_new_day():
+    global _day
+    _inside.clear()
+    _by_group.clear()
+    _day = date.today()
+
+
+def reconcile():
+    """Rebuilds the counters from member_presence."""
+    global _inside, _by_group, _day, _journal
+
+    with _lock:
+        _journal = []
+
+    conn = get_db_connection()
+    if conn is None:
+        with _lock:
+            _journal = None
+        return False
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        day_start, _ = day_range()
+        cur.execute(RECONCILE_QUERY, (day_start,))
+        rows = cur.fetchall()
+    except Exception:
+        with _lock:
+            _journal = None
+        raise
+    finally:
+        conn.close()
+
+    inside = {}
+    by_group = Counter()
+    for r in rows:
+        key = (r["department"], r["role"])
+        inside[r["user_id"]] = key
+        by_group[key] += 1
+
+    with _lock:
+        journal, _journal = _journal, None
+        _inside, _by_group = inside, by_group
+        _day = day_start.date()
+        # replay events committed while we were reading (idempotent)
+        for event in journal:
+            _apply(*event)
+    return True
+
+
+def snapshot():
+    with _lock:
+        if _day != date.today():
+            _reset_for_new_day()
+
+        by_department = Counter()
+        by_role = Counter()
+        for (dept, role), n in _by_group.items():
+            by_department[dept] += n
+            by_role[role] += n
+
+        return {
+            "inside_now": len(_inside),
+            "by_role": {
+                "student": by_role.get("student", 0),
+                "teacher": by_role.get("teacher", 0)
+            },
+            "by_department": [
+                {"department": d, "count": n}
+                for d, n in sorted(by_department.items())
+            ]
+        }
+
+
+# ======================================================
+# BACKGROUND RECONCILE
+# ======================================================
+def _loop():
+    while not _stop.wait(RECONCILE_SECONDS):
+        try:
+            reconcile()
+        except Exception as e:
+            print("❌ Occupancy reconcile failed:", e)
+
+
+def start():
+    global _thread
+    # a DB outage at boot must not stop the app; the loop catches up
+    try:
+        reconcile()
+    except Exception as e:
+        print("❌ Occupancy reconcile failed at startup:", e)
+    if _thread is None:
+        _stop.clear()
+        _thread = threading.Thread(target=_loop, name="occupancy-reconcile", daemon=True)
+        _thread.start()
+
+
+def stop():
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
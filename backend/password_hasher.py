@@ -0,0 +1,43 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import hash_password, verify_password
+
+# bcrypt releases the GIL, so a small thread pool caps CPU use without
+# holding the threads FastAPI needs for scans
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "16"))
+
+
+class HasherBusy(Exception):
+    """More hash jobs queued than HASH_MAX_PENDING."""
+
+
+# ======================================================
+# PASSWORD HASHING POOL
+# ======================================================
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_slots = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+
+def _submit(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HasherBusy()
+    try:
+        future = _executor.submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+async def verify_async(plain_password, hashed_password):
+    """Awaitable bcrypt verify; the event loop is free while it runs."""
+    return await asyncio.wrap_future(_submit(verify_password, plain_password, hashed_password))
+
+
+async def hash_async(password):
+    return await asyncio.wrap_future(_submit(hash_password, password))
@@ -0,0 +1,85 @@
+from database import db_connection
+
+
+# ======================================================
+# MEMBER PRESENCE (last ENTRY / EXIT per user)
+# ======================================================
+# member_presence holds one row per user and is written in the same
+# transaction as the log insert, so the ENTRY/EXIT toggle is a primary
+# key lookup instead of `ORDER BY scan_time DESC` over all of logs.
+
+# Creates the row for a first-time user so there is always something to
+# lock. 'EXIT' reads the same as "no row" (the next action is ENTRY),
+# and record() overwrites it before the transaction commits.
+# The ensure and the locking SELECT stay two statements on purpose: an
+# upsert cannot hand back the column it locked without encoding it
+# through LAST_INSERT_ID(), and one extra primary-key round trip per
+# scan is cheaper than that trick is to maintain.
+ENSURE_ROW_QUERY = """
+    INSERT INTO member_presence (user_id, last_action, last_log_id, last_scan_time)
+    VALUES (%s, 'EXIT', 0, NOW())
+    ON DUPLICATE KEY UPDATE user_id = user_id
+"""
+
+LAST_ACTION_QUERY = """
+    SELECT last_action
+    FROM member_presence
+    WHERE user_id = %s
+    FOR UPDATE
+"""
+
+UPSERT_QUERY = """
+    INSERT INTO member_presence (user_id, last_action, last_log_id, last_scan_time)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        last_action = VALUES(last_action),
+        last_log_id = VALUES(last_log_id),
+        last_scan_time = VALUES(last_scan_time)
+"""
+
+REBUILD_QUERY = """
+    INSERT INTO member_presence (user_id, last_action, last_log_id, last_scan_time)
+    SELECT l.user_id, l.action, l.log_id, l.scan_time
+    FROM logs l
+    JOIN (
+        SELECT user_id, MAX(log_id) AS log_id
+        FROM logs
+        GROUP BY user_id
+    ) latest ON latest.log_id = l.log_id
+    ON DUPLICATE KEY UPDATE
+        last_action = VALUES(last_action),
+        last_log_id = VALUES(last_log_id),
+        last_scan_time = VALUES(last_scan_time)
+"""
+
+
+def get_last_action(cur, user_id):
+    """
+    Locks the user's presence row and returns its last action. Call it
+    in the transaction that will insert the log: a concurrent scan of
+    the same user waits here until that commits, then sees its action,
+    so two quick scans toggle ENTRY → EXIT instead of logging ENTRY
+    twice. `cur` must be a dictionary cursor.
+    """
+    cur.execute(ENSURE_ROW_QUERY, (user_id,))
+    cur.execute(LAST_ACTION_QUERY, (user_id,))
+    row = cur.fetchone()
+    return row["last_action"] if row else None
+
+
+def record(cur, user_id, action, log_id, scan_time):
+    """Call inside the transaction that inserted log_id (before commit)."""
+    cur.execute(UPSERT_QUERY, (user_id, action, log_id, scan_time))
+
+
+def rebuild():
+    """Backfills member_presence from logs (run once after migrating)."""
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(REBUILD_QUERY)
+        conn.commit()
+        return cur.rowcount
+
+
+if __name__ == "__main__":
+    print("member_presence rows written:", rebuild())
@@ -0,0 +1,106 @@
+from datetime import datetime, date, timedelta
+from fastapi import HTTPException
+
+
+# ======================================================
+# DATE RANGES (half-open, index friendly)
+# ======================================================
+# `scan_time >= start AND scan_time < end` can use an index on
+# scan_time; `DATE(scan_time) = ...` cannot.
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+
+
+def day_range(day=None):
+    """[day 00:00, next day 00:00) – today when day is None."""
+    d = parse_date(day) if day else date.today()
+    start = datetime.combine(d, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def hour_range(day, start_hour, end_hour):
+    """[day start_hour:00, day end_hour+1:00) – inclusive of end_hour."""
+    start, _ = day_range(day)
+    return start + timedelta(hours=start_hour), start + timedelta(hours=end_hour + 1)
+
+
+def add_time_range(conditions, params, column, start=None, end=None):
+    """Appends `column >= start` / `column < end` when given."""
+    if start is not None:
+        conditions.append(f"{column} >= %s")
+        params.append(start)
+    if end is not None:
+        conditions.append(f"{column} < %s")
+        params.append(end)
+
+
+def add_date_filters(conditions, params, column, date_from="", date_to=""):
+    """dateFrom / dateTo request params (inclusive days) → half-open range."""
+    start = day_range(date_from)[0] if date_from else None
+    end = day_range(date_to)[1] if date_to else None
+    add_time_range(conditions, params, column, start, end)
+
+
+def where(conditions):
+    return ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+
+# ======================================================
+# LOG FILTERS (shared by /admin/logs and /admin/logs/export)
+# ======================================================
+def log_filters(user_id="", role="", department="", year="", division="",
+                batch="", action="", status="", date_from="", date_to=""):
+    """
+    Builds conditions for `logs LEFT JOIN students LEFT JOIN teachers`.
+    Inputs are expected to be normalized already.
+    """
+    conditions = []
+    params = []
+
+    if user_id:
+        conditions.append("logs.user_id LIKE %s")
+        params.append(f"%{user_id}%")
+
+    if department:
+        conditions.append(
+            "(students.department = %s OR teachers.department = %s)"
+        )
+        params.extend([department, department])
+
+    if action:
+        conditions.append("logs.action = %s")
+        params.append(action)
+
+    if status:
+        conditions.append("logs.status = %s")
+        params.append(status)
+
+    add_date_filters(conditions, params, "logs.scan_time", date_from, date_to)
+
+    if role == "student":
+        conditions.append("students.student_id IS NOT NULL")
+
+    if role == "teacher":
+        conditions.append("teachers.teacher_id IS NOT NULL")
+
+    if year:
+        conditions.append("students.year = %s")
+        params.append(year)
+
+    if division:
+        conditions.append("students.division = %s")
+        params.append(division)
+
+    if batch:
+        conditions.append("students.batch = %s")
+        params.append(batch)
+
+    return conditions, params
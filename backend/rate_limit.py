@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# ======================================================
+# TOKEN BUCKET
+# ======================================================
+class TokenBucketLimiter:
+    """
+    One bucket per key: `capacity` attempts at once, refilled at
+    `rate` tokens per second. Least recently used keys are dropped
+    beyond `max_keys`, so memory stays bounded.
+    """
+
+    def __init__(self, capacity, rate, max_keys=10000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()    # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """0 if allowed, else seconds until the next token."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.rate
+
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+# ======================================================
+# ADMIN LOGIN LIMITS
+# ======================================================
+# 5 tries per username (then 1 per 12 s), 20 per IP (then 1 per 3 s)
+login_by_user = TokenBucketLimiter(capacity=5, rate=1 / 12)
+login_by_ip = TokenBucketLimiter(capacity=20, rate=1 / 3)
+
+
+def check_login(username, ip):
+    """Seconds to wait before another attempt (0 = go ahead)."""
+    return max(
+        login_by_ip.take(ip or ""),
+        login_by_user.take((username or "").strip().lower())
+    )
+
+
+def login_succeeded(username):
+    login_by_user.reset((username or "").strip().lower())
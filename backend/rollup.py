@@ -0,0 +1,91 @@
+import sys
+from database import db_connection
+from query_builder import day_range
+
+
+# ======================================================
+# HOURLY LOG ROLLUP
+# ======================================================
+# log_rollup_hourly keeps per (date, hour, department, role) counters,
+# bumped in the same transaction as each log insert. Chart endpoints
+# read these few rows instead of grouping the raw logs.
+
+RECORD_QUERY = """
+    INSERT INTO log_rollup_hourly
+    (rollup_date, hour, department, role, entries, exits, skips)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        entries = entries + VALUES(entries),
+        exits = exits + VALUES(exits),
+        skips = skips + VALUES(skips)
+"""
+
+REBUILD_QUERY = """
+    INSERT INTO log_rollup_hourly
+    (rollup_date, hour, department, role, entries, exits, skips)
+    SELECT
+        DATE(logs.scan_time),
+        HOUR(logs.scan_time),
+        COALESCE(teachers.department, students.department, ''),
+        CASE WHEN teachers.teacher_id IS NOT NULL THEN 'teacher' ELSE 'student' END,
+        SUM(logs.action = 'ENTRY'),
+        SUM(logs.action = 'EXIT'),
+        SUM(logs.status = 'SKIP')
+    FROM logs
+    LEFT JOIN students ON students.student_id = logs.user_id
+    LEFT JOIN teachers ON teachers.teacher_id = logs.user_id
+    WHERE logs.scan_time >= %s AND logs.scan_time < %s
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+def record(cur, scan_time, department, role, action, status):
+    """Call inside the transaction that inserted the log row."""
+    cur.execute(RECORD_QUERY, (
+        scan_time.date(),
+        scan_time.hour,
+        department or "",
+        role,
+        1 if action == "ENTRY" else 0,
+        1 if action == "EXIT" else 0,
+        1 if status == "SKIP" else 0
+    ))
+
+
+def rebuild(date_from=None, date_to=None):
+    """
+    Recomputes the rollup from logs for [date_from, date_to] (inclusive
+    days). With no dates the whole history is rebuilt.
+    """
+    with db_connection() as conn:
+        cur = conn.cursor()
+
+        if date_from or date_to:
+            start = day_range(date_from)[0] if date_from else None
+            end = day_range(date_to)[1] if date_to else None
+        else:
+            start = end = None
+
+        if start is None:
+            cur.execute("SELECT MIN(scan_time) FROM logs")
+            first = cur.fetchone()[0]
+            if first is None:
+                return 0
+            start = day_range(first)[0]
+        if end is None:
+            end = day_range()[1]
+
+        cur.execute(
+            "DELETE FROM log_rollup_hourly WHERE rollup_date >= %s AND rollup_date < %s",
+            (start.date(), end.date())
+        )
+        cur.execute(REBUILD_QUERY, (start, end))
+        written = cur.rowcount
+        conn.commit()
+        return written
+
+
+if __name__ == "__main__":
+    # python rollup.py [YYYY-MM-DD [YYYY-MM-DD]]
+    args = sys.argv[1:]
+    print("log_rollup_hourly rows written:", rebuild(*args[:2]))
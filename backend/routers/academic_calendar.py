@@ -3,6 +3,7 @@ from database import get_db_connection
 from pydantic import BaseModel
 from typing import List
 from utils import normalize_text   # ✅ ADDED
+import calendar_index
 
 router = APIRouter(prefix="/academic-calendar", tags=["Academic Calendar"])
 
@@ -48,6 +49,7 @@ def add_event(event: AcademicEvent):
 
     cursor.close()
     conn.close()
+    calendar_index.invalidate()
     return {"message": "Academic event added successfully"}
 
 
@@ -75,6 +77,7 @@ def update_event(event_id: int, event: AcademicEvent):
 
     cursor.close()
     conn.close()
+    calendar_index.invalidate()
     return {"message": "Academic event updated successfully"}
 
 
@@ -95,6 +98,7 @@ def delete_event(event_id: int):
 
     cursor.close()
     conn.close()
+    calendar_index.invalidate()
     return {"message": "Academic event deleted successfully"}
 
 
@@ -123,6 +127,7 @@ def bulk_add_events(events: List[AcademicEvent]):
     conn.commit()
     cursor.close()
     conn.close()
+    calendar_index.invalidate()
 
     return {"message": "Bulk events uploaded successfully"}
 
@@ -1,42 +1,74 @@
-from fastapi import APIRouter
+import math
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from database import get_db_connection
 from schemas import AdminLoginRequest
 from schemas import AdminProfileResponse
 from fastapi import HTTPException
 from schemas import UpdateAdminRequest
 from passlib.exc import UnknownHashError
-from utils import verify_password, hash_password
+import password_hasher
+import rate_limit
+import session_tokens
+from session_tokens import require_admin
 
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-@router.post("/login")
-def admin_login(data: AdminLoginRequest):
+def fetch_admin(username):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     cursor.execute(
         "SELECT * FROM admin WHERE username=%s LIMIT 1",
-        (data.username,)
+        (username,)
     )
     admin = cursor.fetchone()
     conn.close()
+    return admin
+
+
+# async: bcrypt runs on password_hasher's pool, the DB read on the
+# threadpool, so a login burst doesn't hold the workers scans use
+@router.post("/login")
+async def admin_login(data: AdminLoginRequest, request: Request):
+    ip = request.client.host if request.client else ""
+    wait = rate_limit.check_login(data.username, ip)
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+    admin = await run_in_threadpool(fetch_admin, data.username)
 
     if not admin:
         return {"status": "failed", "message": "Invalid credentials"}
 
-    if not verify_password(data.password, admin["password_hash"]):
+    try:
+        is_valid = await password_hasher.verify_async(data.password, admin["password_hash"])
+    except password_hasher.HasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, try again")
+    except (UnknownHashError, ValueError):
+        is_valid = False
+
+    if not is_valid:
         return {"status": "failed", "message": "Invalid credentials"}
 
+    rate_limit.login_succeeded(data.username)
+
     return {
         "status": "success",
         "username": admin["username"],
-        "role": admin["role"]
+        "role": admin["role"],
+        "token": session_tokens.issue(admin["username"], admin["role"]),
+        "expires_in": session_tokens.TOKEN_TTL_SECONDS
     }
 
 
 
-@router.get("/profile", response_model=AdminProfileResponse)
+@router.get("/profile", response_model=AdminProfileResponse, dependencies=[Depends(require_admin)])
 def get_admin_profile():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -51,29 +83,48 @@ def get_admin_profile():
 
     return admin
 
-from passlib.exc import UnknownHashError
 
-@router.put("/update-profile")
-def update_admin_profile(data: UpdateAdminRequest):
+def fetch_profile_admin():
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("SELECT * FROM admin LIMIT 1")
+    admin = cursor.fetchone()
+    conn.close()
+    return admin
+
+
+def save_admin_credentials(admin_id, username, password_hash):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "UPDATE admin SET username=%s, password_hash=%s WHERE admin_id=%s",
+            (username, password_hash, admin_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
 
-        cursor.execute("SELECT * FROM admin LIMIT 1")
-        admin = cursor.fetchone()
+
+# async for the same reason as login: both bcrypt calls are awaited on
+# password_hasher's pool instead of blocking a threadpool worker
+@router.put("/update-profile", dependencies=[Depends(require_admin)])
+async def update_admin_profile(data: UpdateAdminRequest):
+    try:
+        admin = await run_in_threadpool(fetch_profile_admin)
 
         if not admin:
             raise HTTPException(status_code=404, detail="Admin not found")
 
-        # DEBUG (temporary)
-        print("OLD PASSWORD INPUT:", data.old_password)
-        print("HASH FROM DB:", admin["password_hash"])
-
         try:
-            is_valid = verify_password(
+            is_valid = await password_hasher.verify_async(
                 data.old_password,
                 admin["password_hash"]
             )
+        except password_hasher.HasherBusy:
+            raise HTTPException(status_code=503, detail="Server busy, try again")
         except UnknownHashError:
             raise HTTPException(
                 status_code=400,
@@ -86,16 +137,16 @@ def update_admin_profile(data: UpdateAdminRequest):
                 detail="Old password is incorrect"
             )
 
-        new_hashed_password = hash_password(data.new_password)
+        try:
+            new_hashed_password = await password_hasher.hash_async(data.new_password)
+        except password_hasher.HasherBusy:
+            raise HTTPException(status_code=503, detail="Server busy, try again")
 
-        cursor.execute(
-            "UPDATE admin SET username=%s, password_hash=%s WHERE admin_id=%s",
-            (data.username, new_hashed_password, admin["admin_id"])
+        await run_in_threadpool(
+            save_admin_credentials,
+            admin["admin_id"], data.username, new_hashed_password
         )
 
-        conn.commit()
-        conn.close()
-
         return {
             "status": "success",
             "message": "Admin credentials updated successfully"
@@ -1,93 +1,153 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from database import get_db_connection
-from datetime import datetime
 from utils import normalize_text   # ✅ ADDED
+from query_builder import day_range
+from count_cache import CountCache
+import occupancy
+import metadata_cache
 
 router = APIRouter(prefix="/admin", tags=["Dashboard"])
 
 
-@router.get("/stats")
-def dashboard_stats():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+# ======================================================
+# SINGLE-PASS AGGREGATES
+# ======================================================
+TODAY_AGGREGATE_QUERY = """
+    SELECT
+        COUNT(*) AS total_today,
+        COALESCE(SUM(action='ENTRY'), 0) AS today_entries,
+        COALESCE(SUM(action='EXIT'), 0) AS today_exits,
+        COALESCE(SUM(status='SKIP'), 0) AS skips_today,
+        (SELECT COUNT(*) FROM students WHERE active=1) AS total_students,
+        (SELECT COUNT(*) FROM teachers WHERE active=1) AS total_teachers
+    FROM logs
+    WHERE scan_time >= %s AND scan_time < %s
+"""
+
+# every log row is an ENTRY or an EXIT, so the rollup holds the all-time
+# total in a few rows per hour instead of a COUNT(*) over logs. Both
+# MIN()s are index lookups; they show whether the rollup reaches back to
+# the first log (it does not until `python rollup.py` has backfilled).
+TOTAL_LOGS_QUERY = """
+    SELECT
+        COALESCE(SUM(entries + exits), 0) AS total,
+        MIN(rollup_date) AS covered_from,
+        (SELECT DATE(MIN(scan_time)) FROM logs) AS first_log_date
+    FROM log_rollup_hourly
+"""
+
+COUNT_LOGS_QUERY = "SELECT COUNT(*) AS total FROM logs"
+
+LOGS_BY_HOUR_QUERY = """
+    SELECT hour AS hr, SUM(entries + exits) AS cnt
+    FROM log_rollup_hourly
+    WHERE rollup_date = %s
+    GROUP BY hour
+    ORDER BY hour
+"""
+
+
+total_logs_cache = CountCache(ttl=60, max_entries=1, workers=1)
+
+
+def total_logs(cur):
+    """From the rollup, or COUNT(*) over logs while history is not backfilled."""
+    cur.execute(TOTAL_LOGS_QUERY)
+    row = cur.fetchone()
+    first_log_date = row["first_log_date"]
+    if first_log_date is not None and (
+        row["covered_from"] is None or row["covered_from"] > first_log_date
+    ):
+        cur.execute(COUNT_LOGS_QUERY)
+        row = cur.fetchone()
+    return int(row["total"])
+
+
+def cached_total_logs(cur):
+    """
+    All-time log count. Read inline only the first time; after that the
+    dashboard gets the cached value and stale ones refresh in the
+    background (the page adds live deltas on top).
+    """
+    def compute():
+        conn = get_db_connection()
+        try:
+            return total_logs(conn.cursor(dictionary=True))
+        finally:
+            conn.close()
+
+    total, fresh = total_logs_cache.get("total_logs")
+    if total is None:
+        total = total_logs(cur)
+        total_logs_cache.put("total_logs", total)
+    elif not fresh:
+        total_logs_cache.refresh_async("total_logs", compute)
+    return total
+
+
+def fetch_today_aggregates(cur):
+    """All of today's counters in one conditional-aggregation pass."""
+    day_start, day_end = day_range()
+    cur.execute(TODAY_AGGREGATE_QUERY, (day_start, day_end))
+    row = cur.fetchone()
+    agg = {k: int(v or 0) for k, v in row.items()}
+    agg["total_logs"] = cached_total_logs(cur)
+    return agg
+
+
+def fetch_logs_by_hour(cur):
+    day_start, _ = day_range()
+    cur.execute(LOGS_BY_HOUR_QUERY, (day_start.date(),))
+    return [{"hour": r["hr"], "count": int(r["cnt"])} for r in cur.fetchall()]
+
+
+def build_stats(agg):
+    return {
+        "inside_now": occupancy.snapshot()["inside_now"],
+        "alerts_today": agg["skips_today"],
+        "total_entries_today": agg["total_today"]
+    }
 
-    cursor.execute("""
-        SELECT COUNT(*) AS count
-        FROM logs
-        WHERE action='ENTRY'
-    """)
-    total_inside = cursor.fetchone()["count"]
 
-    cursor.execute("""
-        SELECT COUNT(*) AS count
-        FROM logs
-        WHERE status='SKIP' AND DATE(scan_time)=CURDATE()
-    """)
-    alerts_today = cursor.fetchone()["count"]
-
-    cursor.execute("""
-        SELECT COUNT(*) AS count
-        FROM logs
-        WHERE DATE(scan_time)=CURDATE()
-    """)
-    total_today = cursor.fetchone()["count"]
+def build_summary(agg):
+    return {
+        "total_students": agg["total_students"],
+        "total_teachers": agg["total_teachers"],
+        "today_entries": agg["today_entries"],
+        "today_exits": agg["today_exits"],
+        "total_logs": agg["total_logs"],
+        "skipping_alerts": agg["skips_today"]
+    }
 
-    conn.close()
 
+def build_charts(agg, logs_by_hour):
     return {
-        "inside_now": total_inside,
-        "alerts_today": alerts_today,
-        "total_entries_today": total_today
+        "members": {"students": agg["total_students"], "teachers": agg["total_teachers"]},
+        "today": {"entry": agg["today_entries"], "exit": agg["today_exits"]},
+        "logs_by_hour": logs_by_hour
     }
 
 
-@router.get("/summary")
-def admin_summary():
+@router.get("/stats")
+def dashboard_stats():
     conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("SELECT COUNT(*) AS cnt FROM students")
-    total_students = cur.fetchone()["cnt"]
-
-    cur.execute("SELECT COUNT(*) AS cnt FROM teachers")
-    total_teachers = cur.fetchone()["cnt"]
+    cursor = conn.cursor(dictionary=True)
 
-    today = datetime.now().strftime("%Y-%m-%d")
+    agg = fetch_today_aggregates(cursor)
 
-    cur.execute("""
-        SELECT COUNT(*) AS cnt
-        FROM logs
-        WHERE DATE(scan_time)=%s AND action='ENTRY'
-    """, (today,))
-    today_entries = cur.fetchone()["cnt"]
+    conn.close()
+    return build_stats(agg)
 
-    cur.execute("""
-        SELECT COUNT(*) AS cnt
-        FROM logs
-        WHERE DATE(scan_time)=%s AND action='EXIT'
-    """, (today,))
-    today_exits = cur.fetchone()["cnt"]
 
-    cur.execute("SELECT COUNT(*) AS cnt FROM logs")
-    total_logs = cur.fetchone()["cnt"]
+@router.get("/summary")
+def admin_summary():
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
 
-    cur.execute("""
-        SELECT COUNT(*) AS cnt
-        FROM logs
-        WHERE status='SKIP' AND DATE(scan_time)=%s
-    """, (today,))
-    skipping_alerts = cur.fetchone()["cnt"]
+    agg = fetch_today_aggregates(cur)
 
     conn.close()
-
-    return {
-        "total_students": total_students,
-        "total_teachers": total_teachers,
-        "today_entries": today_entries,
-        "today_exits": today_exits,
-        "total_logs": total_logs,
-        "skipping_alerts": skipping_alerts
-    }
+    return build_summary(agg)
 
 
 @router.get("/stats/charts")
@@ -95,69 +155,50 @@ def stats_charts():
     conn = get_db_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT COUNT(*) AS cnt FROM students")
-    students = cur.fetchone()["cnt"]
-
-    cur.execute("SELECT COUNT(*) AS cnt FROM teachers")
-    teachers = cur.fetchone()["cnt"]
-
-    today = datetime.now().strftime("%Y-%m-%d")
-
-    cur.execute("""
-        SELECT COUNT(*) AS cnt
-        FROM logs
-        WHERE DATE(scan_time)=%s AND action='ENTRY'
-    """, (today,))
-    entry = cur.fetchone()["cnt"]
-
-    cur.execute("""
-        SELECT COUNT(*) AS cnt
-        FROM logs
-        WHERE DATE(scan_time)=%s AND action='EXIT'
-    """, (today,))
-    exitc = cur.fetchone()["cnt"]
-
-    cur.execute("""
-        SELECT HOUR(scan_time) AS hr, COUNT(*) AS cnt
-        FROM logs
-        WHERE DATE(scan_time)=%s
-        GROUP BY HOUR(scan_time)
-        ORDER BY hr
-    """, (today,))
-    rows = cur.fetchall()
+    agg = fetch_today_aggregates(cur)
+    logs_by_hour = fetch_logs_by_hour(cur)
 
     conn.close()
-
-    return {
-        "members": {"students": students, "teachers": teachers},
-        "today": {"entry": entry, "exit": exitc},
-        "logs_by_hour": [{"hour": r["hr"], "count": r["cnt"]} for r in rows]
-    }
+    return build_charts(agg, logs_by_hour)
 
 
-@router.get("/filters")
-def get_filter_options():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+# ======================================================
+# LIVE OCCUPANCY (in-memory, no query)
+# ======================================================
+@router.get("/occupancy")
+def live_occupancy():
+    return occupancy.snapshot()
 
-    cursor.execute("SELECT DISTINCT department FROM students")
-    departments = [row["department"] for row in cursor.fetchall()]
 
-    cursor.execute("SELECT DISTINCT year FROM students")
-    years = [row["year"] for row in cursor.fetchall()]
+# ======================================================
+# COMBINED DASHBOARD (one request for Dashboard.jsx)
+# ======================================================
+@router.get("/dashboard")
+def dashboard_overview():
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
 
-    cursor.execute("SELECT DISTINCT division FROM students")
-    divisions = [row["division"] for row in cursor.fetchall()]
+    agg = fetch_today_aggregates(cur)
+    logs_by_hour = fetch_logs_by_hour(cur)
 
     conn.close()
-
     return {
-        "departments": departments,
-        "years": years,
-        "divisions": divisions
+        "summary": build_summary(agg),
+        "stats": build_stats(agg),
+        "charts": build_charts(agg, logs_by_hour),
+        "occupancy": occupancy.snapshot()
     }
 
 
+@router.get("/filters")
+def get_filter_options(request: Request):
+    return metadata_cache.etag_response(request, {
+        "departments": metadata_cache.student_values("department"),
+        "years": metadata_cache.student_values("year"),
+        "divisions": metadata_cache.student_values("division")
+    })
+
+
 @router.get("/charts/members")
 def members_chart(
     member_type: str = None,
@@ -175,10 +216,10 @@ def members_chart(
     cursor = conn.cursor(dictionary=True)
 
     if not member_type:
-        cursor.execute("SELECT COUNT(*) AS count FROM students")
+        cursor.execute("SELECT COUNT(*) AS count FROM students WHERE active=1")
         student_count = cursor.fetchone()["count"]
 
-        cursor.execute("SELECT COUNT(*) AS count FROM teachers")
+        cursor.execute("SELECT COUNT(*) AS count FROM teachers WHERE active=1")
         teacher_count = cursor.fetchone()["count"]
 
         conn.close()
@@ -188,7 +229,7 @@ def members_chart(
         ]
 
     if member_type == "student":
-        query = "SELECT COUNT(*) AS count FROM students WHERE 1=1"
+        query = "SELECT COUNT(*) AS count FROM students WHERE active=1"
         params = []
 
         if department:
@@ -210,7 +251,7 @@ def members_chart(
         return [{"name": "Students", "value": count}]
 
     if member_type == "teacher":
-        query = "SELECT COUNT(*) AS count FROM teachers WHERE 1=1"
+        query = "SELECT COUNT(*) AS count FROM teachers WHERE active=1"
         params = []
 
         if department:
@@ -225,89 +266,37 @@ def members_chart(
 
 
 @router.get("/filters/student/departments")
-def student_departments():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT DISTINCT department 
-        FROM students 
-        ORDER BY department
-    """)
-    data = [row["department"] for row in cursor.fetchall()]
-
-    conn.close()
-    return data
+def student_departments(request: Request):
+    return metadata_cache.etag_response(
+        request, metadata_cache.student_values("department")
+    )
 
 
 @router.get("/filters/student/years")
-def student_years(department: str = None):
+def student_years(request: Request, department: str = None):
     department = normalize_text(department, "upper")  # ✅ ADDED
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    if department:
-        cursor.execute("""
-            SELECT DISTINCT year
-            FROM students
-            WHERE department = %s
-            ORDER BY year
-        """, (department,))
-    else:
-        cursor.execute("""
-            SELECT DISTINCT year
-            FROM students
-            ORDER BY year
-        """)
-
-    data = [row["year"] for row in cursor.fetchall()]
-    conn.close()
-    return data
+    return metadata_cache.etag_response(
+        request, metadata_cache.student_values("year", department=department)
+    )
 
 
 @router.get("/filters/student/divisions")
-def student_divisions(department: str = None, year: str = None):
+def student_divisions(request: Request, department: str = None, year: str = None):
     department = normalize_text(department, "upper")  # ✅ ADDED
     year = normalize_text(year, "upper")              # ✅ ADDED
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    query = "SELECT DISTINCT division FROM students WHERE 1=1"
-    params = []
-
-    if department:
-        query += " AND department = %s"
-        params.append(department)
-
-    if year:
-        query += " AND year = %s"
-        params.append(year)
-
-    query += " ORDER BY division"
-
-    cursor.execute(query, params)
-    data = [row["division"] for row in cursor.fetchall()]
-
-    conn.close()
-    return data
+    return metadata_cache.etag_response(
+        request,
+        metadata_cache.student_values("division", department=department, year=year)
+    )
 
 
 @router.get("/filters/teacher/departments")
-def teacher_departments():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT DISTINCT department
-        FROM teachers
-        ORDER BY department
-    """)
-
-    data = [row["department"] for row in cursor.fetchall()]
-    conn.close()
-    return data
+def teacher_departments(request: Request):
+    return metadata_cache.etag_response(
+        request, metadata_cache.teacher_departments()
+    )
 
 
 @router.get("/charts/department-wise")
@@ -326,7 +315,7 @@ def department_wise_chart(
     student_query = """
         SELECT department, COUNT(*) AS students
         FROM students
-        WHERE 1=1
+        WHERE active=1
     """
     student_params = []
 
@@ -346,6 +335,7 @@ def department_wise_chart(
     cursor.execute("""
         SELECT department, COUNT(*) AS teachers
         FROM teachers
+        WHERE active=1
         GROUP BY department
     """)
     teacher_data = cursor.fetchall()
@@ -383,41 +373,38 @@ def attendance_timeline(
     start_hour: int = 8,
     end_hour: int = 18
 ):
+    day_start, _ = day_range(date)
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    date_condition = "CURDATE()" if not date else "%s"
-
-    query = f"""
+    # pre-aggregated: at most 24 rows per department/role
+    query = """
         SELECT
-            HOUR(scan_time) AS hr,
-            SUM(action='ENTRY') AS entry_count,
-            SUM(action='EXIT') AS exit_count
-        FROM logs
-        WHERE DATE(scan_time) = {date_condition}
-          AND HOUR(scan_time) BETWEEN %s AND %s
-        GROUP BY hr
-        ORDER BY hr
+            hour AS hr,
+            SUM(entries) AS entry_count,
+            SUM(exits) AS exit_count,
+            SUM(skips) AS skip_count
+        FROM log_rollup_hourly
+        WHERE rollup_date = %s
+          AND hour BETWEEN %s AND %s
+        GROUP BY hour
+        ORDER BY hour
     """
 
-    params = []
-    if date:
-        params.append(date)
-    params.extend([start_hour, end_hour])
-
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    cursor.execute(query, (day_start.date(), start_hour, end_hour))
+    rows = {r["hr"]: r for r in cursor.fetchall()}
     conn.close()
 
     timeline = []
     for h in range(start_hour, end_hour + 1):
         label = f"{h if h<=12 else h-12} {'AM' if h<12 else 'PM'}"
-        row = next((r for r in rows if r["hr"] == h), None)
+        row = rows.get(h)
         timeline.append({
             "time": label,
-            "entry": row["entry_count"] if row else 0,
-            "exit": row["exit_count"] if row else 0,
-            "skip": 0
+            "entry": int(row["entry_count"]) if row else 0,
+            "exit": int(row["exit_count"]) if row else 0,
+            "skip": int(row["skip_count"]) if row else 0
         })
 
     return timeline
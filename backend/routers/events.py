@@ -0,0 +1,46 @@
+import asyncio
+import json
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+import live_events
+import occupancy
+
+router = APIRouter(prefix="/admin", tags=["Events"])
+
+HEARTBEAT_SECONDS = 15
+
+
+# ======================================================
+# LIVE EVENT STREAM (SSE)
+# ======================================================
+@router.get("/events")
+async def event_stream(request: Request):
+    sub = live_events.subscribe()
+    _, queue = sub
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            yield f"event: occupancy\ndata: {json.dumps(occupancy.snapshot())}\n\n"
+
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                    yield message
+                except asyncio.TimeoutError:
+                    # keeps proxies from closing an idle stream
+                    yield ": ping\n\n"
+        finally:
+            live_events.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -1,12 +1,50 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from database import get_db_connection
 import math
+import base64
+import json
 from fastapi.responses import StreamingResponse
 import csv, io
 from utils import normalize_text   # ✅ ADDED
+from count_cache import CountCache
+from query_builder import log_filters, where
+from datetime import datetime
+import presence
+import rollup
+import member_directory
+import occupancy
+import live_events
+import metrics
+import metadata_cache
 
 router = APIRouter(prefix="/admin/logs", tags=["Logs"])
 
+# exact totals per filter signature, refreshed in the background
+logs_count_cache = CountCache(ttl=60)
+
+
+# =========================================================
+# KEYSET CURSOR HELPERS
+# =========================================================
+def encode_cursor(scan_time, log_id, direction):
+    payload = json.dumps({
+        "t": scan_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "id": log_id,
+        "d": direction
+    })
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["d"] not in ("next", "prev"):
+            raise ValueError
+        return data["t"], int(data["id"]), data["d"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 # =========================================================
 # GET ALL LOGS (WITH FILTERS + PAGINATION)
@@ -24,7 +62,10 @@ def get_logs(
     action: str = "",
     status: str = "",
     dateFrom: str = "",
-    dateTo: str = ""
+    dateTo: str = "",
+    paging: str = "offset",     # offset | cursor
+    cursor: str = "",
+    count: str = "exact"        # exact | cached | estimate | none
 ):
 
     # ✅ NORMALIZATION (ADDED)
@@ -37,59 +78,28 @@ def get_logs(
     action = normalize_text(action, "upper")
     status = normalize_text(status, "upper")
 
+    conditions, params = log_filters(
+        user_id=user_id, role=role, department=department,
+        year=year, division=division, batch=batch,
+        action=action, status=status,
+        date_from=dateFrom, date_to=dateTo
+    )
+
     conn = get_db_connection()
     cur = conn.cursor(dictionary=True)
 
-    conditions = []
-    params = []
-
-    if user_id:
-        conditions.append("logs.user_id LIKE %s")
-        params.append(f"%{user_id}%")
-
-    if department:
-        conditions.append(
-            "(students.department = %s OR teachers.department = %s)"
+    if paging == "cursor" or cursor:
+        rows, next_cursor, prev_cursor = fetch_logs_page(
+            cur, conditions, params, page_size, cursor
         )
-        params.extend([department, department])
-
-    if action:
-        conditions.append("logs.action = %s")
-        params.append(action)
-
-    if status:
-        conditions.append("logs.status = %s")
-        params.append(status)
-
-    if dateFrom:
-        conditions.append("DATE(logs.scan_time) >= %s")
-        params.append(dateFrom)
-
-    if dateTo:
-        conditions.append("DATE(logs.scan_time) <= %s")
-        params.append(dateTo)
-
-    if role == "student":
-        conditions.append("students.student_id IS NOT NULL")
-
-    if role == "teacher":
-        conditions.append("teachers.teacher_id IS NOT NULL")
-
-    if year:
-        conditions.append("students.year = %s")
-        params.append(year)
-
-    if division:
-        conditions.append("students.division = %s")
-        params.append(division)
-
-    if batch:
-        conditions.append("students.batch = %s")
-        params.append(batch)
+        conn.close()
+        return {
+            "data": rows,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
+        }
 
-    where_clause = " AND ".join(conditions)
-    if where_clause:
-        where_clause = "WHERE " + where_clause
+    where_clause = where(conditions)
 
     count_query = f"""
         SELECT COUNT(*) AS total
@@ -98,10 +108,9 @@ def get_logs(
         LEFT JOIN teachers ON teachers.teacher_id = logs.user_id
         {where_clause}
     """
-    cur.execute(count_query, params)
-    total = cur.fetchone()["total"]
+    total, total_exact = resolve_total(cur, count_query, params, count)
 
-    total_pages = max(1, math.ceil(total / page_size))
+    total_pages = max(1, math.ceil(total / page_size)) if total is not None else None
     offset = (page - 1) * page_size
 
     query = f"""
@@ -127,16 +136,151 @@ def get_logs(
         LIMIT %s OFFSET %s
     """
 
-    cur.execute(query, params + [page_size, offset])
+    # without a total, one extra row tells the client whether to show "next"
+    cur.execute(query, params + [page_size + 1, offset])
     rows = cur.fetchall()
     conn.close()
 
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
     return {
         "data": rows,
-        "total_pages": total_pages
+        "total_pages": total_pages,
+        "total": total,
+        "total_exact": total_exact,
+        "has_more": has_more
     }
 
 
+def resolve_total(cur, count_query, params, mode):
+    """
+    Returns (total or None, is_exact).
+      exact    → COUNT(*) now (also refreshes the cache)
+      cached   → last exact count for these filters, refreshed in background
+      estimate → optimizer row estimate, exact count refreshed in background
+      none     → no total at all
+    """
+    key = json.dumps([count_query, params], default=str)
+
+    def compute():
+        conn = get_db_connection()
+        try:
+            c = conn.cursor(dictionary=True)
+            c.execute(count_query, params)
+            return c.fetchone()["total"]
+        finally:
+            conn.close()
+
+    if mode == "none":
+        return None, False
+
+    if mode == "cached":
+        total, fresh = logs_count_cache.get_or_refresh(key, compute)
+        if total is not None:
+            return total, fresh
+        return estimate_total(cur, count_query, params), False
+
+    if mode == "estimate":
+        total, fresh = logs_count_cache.get(key)
+        if fresh:
+            return total, True
+        logs_count_cache.refresh_async(key, compute)
+        return estimate_total(cur, count_query, params), False
+
+    cur.execute(count_query, params)
+    total = cur.fetchone()["total"]
+    logs_count_cache.put(key, total)
+    return total, True
+
+
+def estimate_total(cur, count_query, params):
+    """Row estimate for the logs table from EXPLAIN (no scan)."""
+    cur.execute("EXPLAIN " + count_query, params)
+    plan = cur.fetchall()
+    for row in plan:
+        if row.get("table") == "logs":
+            rows = row.get("rows") or 0
+            filtered = row.get("filtered") or 100
+            return int(rows * float(filtered) / 100)
+    return 0
+
+
+def fetch_logs_page(cur, conditions, params, page_size, cursor=""):
+    """
+    Keyset page over (scan_time, log_id) DESC.
+    Cost is the same for every page because the seek predicate
+    replaces OFFSET.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    direction = "next"
+
+    if cursor:
+        cursor_time, cursor_id, direction = decode_cursor(cursor)
+        if direction == "next":
+            conditions.append(
+                "(logs.scan_time < %s OR (logs.scan_time = %s AND logs.log_id < %s))"
+            )
+        else:
+            conditions.append(
+                "(logs.scan_time > %s OR (logs.scan_time = %s AND logs.log_id > %s))"
+            )
+        params.extend([cursor_time, cursor_time, cursor_id])
+
+    where_clause = where(conditions)
+
+    order = "DESC" if direction == "next" else "ASC"
+
+    query = f"""
+        SELECT
+            logs.log_id,
+            logs.user_id,
+            COALESCE(students.name, teachers.name) AS name,
+            CASE
+                WHEN students.student_id IS NOT NULL THEN 'student'
+                ELSE 'teacher'
+            END AS role,
+            COALESCE(students.department, teachers.department) AS department,
+            logs.action,
+            logs.status,
+            logs.matched_subject,
+            logs.matched_teacher_id,
+            logs.scan_time
+        FROM logs
+        LEFT JOIN students ON students.student_id = logs.user_id
+        LEFT JOIN teachers ON teachers.teacher_id = logs.user_id
+        {where_clause}
+        ORDER BY logs.scan_time {order}, logs.log_id {order}
+        LIMIT %s
+    """
+
+    # one extra row tells us whether another page exists
+    cur.execute(query, params + [page_size + 1])
+    rows = cur.fetchall()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if direction == "prev":
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    first, last = rows[0], rows[-1]
+
+    if direction == "next":
+        has_next, has_prev = has_more, bool(cursor)
+    else:
+        has_next, has_prev = True, has_more
+
+    next_cursor = encode_cursor(last["scan_time"], last["log_id"], "next") if has_next else None
+    prev_cursor = encode_cursor(first["scan_time"], first["log_id"], "prev") if has_prev else None
+
+    return rows, next_cursor, prev_cursor
+
+
 # =========================================================
 # RECENT LOGS
 # =========================================================
@@ -179,39 +323,40 @@ def manual_entry(
     conn = get_db_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("""
-        SELECT student_id FROM students WHERE student_id = %s
-        UNION
-        SELECT teacher_id FROM teachers WHERE teacher_id = %s
-    """, (user_id, user_id))
+    member = member_directory.lookup(user_id, cur)
 
-    if not cur.fetchone():
+    if member is None:
+        conn.close()
         raise HTTPException(status_code=404, detail="User not found")
 
-    cur.execute("""
-        SELECT action FROM logs
-        WHERE user_id = %s
-        ORDER BY scan_time DESC
-        LIMIT 1
-    """, (user_id,))
+    last_action = presence.get_last_action(cur, user_id)
 
-    last_log = cur.fetchone()
-
-    if last_log and last_log["action"] == action:
+    if last_action == action:
         conn.close()
         raise HTTPException(
             status_code=400,
             detail=f"User already has an active {action}"
         )
 
+    scan_time = datetime.now().replace(microsecond=0)
     cur.execute("""
         INSERT INTO logs (user_id, scan_time, action, status)
-        VALUES (%s, NOW(), %s, 'NORMAL')
-    """, (user_id, action))
+        VALUES (%s, %s, %s, 'NORMAL')
+    """, (user_id, scan_time, action))
 
+    log_id = cur.lastrowid
+    presence.record(cur, user_id, action, log_id, scan_time)
+    rollup.record(cur, scan_time, member.department, member.role, action, "NORMAL")
     conn.commit()
     conn.close()
 
+    occupancy.record(user_id, action, member.department, member.role)
+    metrics.record_log(action, "NORMAL")
+    live_events.publish_log(
+        log_id, user_id, member.name, member.role, member.department,
+        action, "NORMAL", None, scan_time
+    )
+
     return {
         "status": "success",
         "message": f"{action} recorded successfully"
@@ -219,20 +364,10 @@ def manual_entry(
 
 
 @router.get("/departments")
-def get_departments():
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("""
-        SELECT DISTINCT department FROM students
-        UNION
-        SELECT DISTINCT department FROM teachers
-        ORDER BY department
-    """)
-
-    rows = cur.fetchall()
-    conn.close()
-    return [row["department"] for row in rows if row["department"]]
+def get_departments(request: Request):
+    return metadata_cache.etag_response(
+        request, [d for d in metadata_cache.all_departments() if d]
+    )
 
 
 @router.get("/export")
@@ -249,41 +384,12 @@ def export_logs(
     action = normalize_text(action, "upper")
     status = normalize_text(status, "upper")
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    conditions = []
-    params = []
-
-    if user_id:
-        conditions.append("logs.user_id LIKE %s")
-        params.append(f"%{user_id}%")
-
-    if department:
-        conditions.append(
-            "(students.department = %s OR teachers.department = %s)"
-        )
-        params.extend([department, department])
-
-    if action:
-        conditions.append("logs.action = %s")
-        params.append(action)
-
-    if status:
-        conditions.append("logs.status = %s")
-        params.append(status)
-
-    if dateFrom:
-        conditions.append("DATE(logs.scan_time) >= %s")
-        params.append(dateFrom)
-
-    if dateTo:
-        conditions.append("DATE(logs.scan_time) <= %s")
-        params.append(dateTo)
-
-    where_clause = " AND ".join(conditions)
-    if where_clause:
-        where_clause = "WHERE " + where_clause
+    conditions, params = log_filters(
+        user_id=user_id, department=department,
+        action=action, status=status,
+        date_from=dateFrom, date_to=dateTo
+    )
+    where_clause = where(conditions)
 
     query = f"""
         SELECT
@@ -297,7 +403,7 @@ def export_logs(
             COALESCE(students.department, teachers.department) AS department,
             logs.action,
             logs.status,
-            logs.matched_subject,
+            COALESCE(logs.matched_subject, '') AS matched_subject,
             logs.scan_time
         FROM logs
         LEFT JOIN students ON students.student_id = logs.user_id
@@ -306,36 +412,21 @@ def export_logs(
         ORDER BY logs.scan_time DESC
     """
 
-    cur.execute(query, params)
-    rows = cur.fetchall()
-    conn.close()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    writer.writerow([
-        "Log ID", "User ID", "Name", "Role",
-        "Department", "Action", "Status",
-        "Subject", "Time"
-    ])
-
-    for r in rows:
-        writer.writerow([
-            r["log_id"],
-            r["user_id"],
-            r["name"],
-            r["role"],
-            r["department"],
-            r["action"],
-            r["status"],
-            r["matched_subject"] or "",
-            r["scan_time"]
-        ])
+    # connect and run the query before the 200 goes out, so a missing
+    # connection or a bad query is a proper error, not a truncated file
+    conn = get_db_connection()
+    if conn is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
 
-    output.seek(0)
+    try:
+        cur = conn.cursor(buffered=False)
+        cur.execute(query, params)
+    except Exception:
+        conn.close()
+        raise
 
     return StreamingResponse(
-        output,
+        stream_csv(conn, cur),
         media_type="text/csv",
         headers={
             "Content-Disposition": "attachment; filename=logs_report.csv"
@@ -343,51 +434,64 @@ def export_logs(
     )
 
 
-@router.get("/departments/by-role")
-def get_departments_by_role(role: str = ""):
-    role = normalize_text(role, "lower")   # ✅ ADDED
+EXPORT_CHUNK_ROWS = 1000
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
 
-    if role == "teacher":
-        cur.execute("SELECT DISTINCT department FROM teachers ORDER BY department")
-    elif role == "student":
-        cur.execute("SELECT DISTINCT department FROM students ORDER BY department")
-    else:
-        cur.execute("""
-            SELECT DISTINCT department FROM students
-            UNION
-            SELECT DISTINCT department FROM teachers
-            ORDER BY department
-        """)
+def stream_csv(conn, cur):
+    """
+    Yields the export in chunks straight off an unbuffered cursor that
+    has already executed the query, so memory stays flat no matter how
+    many rows match. Closes conn when done.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
 
-    rows = cur.fetchall()
-    conn.close()
-    return [r["department"] for r in rows]
+    try:
+        writer.writerow([
+            "Log ID", "User ID", "Name", "Role",
+            "Department", "Action", "Status",
+            "Subject", "Time"
+        ])
 
+        while True:
+            rows = cur.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+
+            writer.writerows(rows)
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+
+        # header only (no rows)
+        if output.tell():
+            yield output.getvalue()
+    finally:
+        # an aborted download leaves unread rows; the pool drops that socket
+        conn.close()
 
-@router.get("/students/meta")
-def student_meta():
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT DISTINCT year FROM students ORDER BY year")
-    years = [r["year"] for r in cur.fetchall()]
+@router.get("/departments/by-role")
+def get_departments_by_role(request: Request, role: str = ""):
+    role = normalize_text(role, "lower")   # ✅ ADDED
 
-    cur.execute("SELECT DISTINCT division FROM students ORDER BY division")
-    divisions = [r["division"] for r in cur.fetchall()]
+    if role == "teacher":
+        data = metadata_cache.teacher_departments()
+    elif role == "student":
+        data = metadata_cache.student_values("department")
+    else:
+        data = metadata_cache.all_departments()
 
-    cur.execute("SELECT DISTINCT batch FROM students ORDER BY batch")
-    batches = [r["batch"] for r in cur.fetchall()]
+    return metadata_cache.etag_response(request, data)
 
-    conn.close()
 
-    return {
-        "years": years,
-        "divisions": divisions,
-        "batches": batches
-    }
+@router.get("/students/meta")
+def student_meta(request: Request):
+    return metadata_cache.etag_response(request, {
+        "years": metadata_cache.student_values("year"),
+        "divisions": metadata_cache.student_values("division"),
+        "batches": metadata_cache.student_values("batch")
+    })
 
 
 # from fastapi import APIRouter, HTTPException
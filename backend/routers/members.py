@@ -1,9 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
 from database import get_db_connection
-import csv
-import io
 import re
-from utils import normalize_text   # ✅ ADDED
+import math
+import base64
+import json
+from utils import normalize_text, iter_csv_upload   # ✅ ADDED
+import member_directory
+import member_search
+import metadata_cache
+from member_import import import_members, sync_members
+from count_cache import CountCache
+from query_builder import where
 
 router = APIRouter(prefix="/admin/members", tags=["Members"])
 
@@ -22,6 +29,64 @@ def is_valid_contact(contact: str) -> bool:
 # ======================================================
 # GET MEMBERS (WITH PAGINATION + FILTERS)
 # ======================================================
+# only what MembersPage renders / edits
+MEMBER_COLUMNS = {
+    "student": "student_id, name, department, year, division, batch, email, contact_no",
+    "teacher": "teacher_id, name, department, email, contact_no, designation"
+}
+
+# totals per filter signature; cleared on member writes
+members_count_cache = CountCache(ttl=300)
+
+
+def encode_cursor(member_id, direction):
+    payload = json.dumps({"id": member_id, "d": direction})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["d"] not in ("next", "prev"):
+            raise ValueError
+        return str(data["id"]), data["d"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# ======================================================
+# SEARCH (TYPE-AHEAD, IN-MEMORY INDEX)
+# ======================================================
+# declared before /{role} so "search" is not taken as a role
+@router.get("/search")
+def search_members(q: str = "", role: str = "", limit: int = 10):
+    role = normalize_text(role, "lower")
+
+    if role and role not in ["student", "teacher"]:
+        raise HTTPException(status_code=400, detail="Invalid role")
+
+    if not member_directory.is_loaded():
+        member_directory.load()
+
+    hits = member_search.search(q, role=role or None, limit=max(1, min(limit, 50)))
+
+    return {
+        "data": [
+            {
+                "member_id": rec.member_id,
+                "role": rec.role,
+                "name": rec.name,
+                "department": rec.department,
+                "year": rec.year,
+                "division": rec.division,
+                "batch": rec.batch
+            }
+            for rec in hits
+        ]
+    }
+
+
 @router.get("/{role}")
 def get_members(
     role: str,
@@ -30,23 +95,32 @@ def get_members(
     department: str = "",
     year: str = "",
     division: str = "",
-    batch: str = ""
+    batch: str = "",
+    member_id: str = "",
+    include_inactive: bool = False,
+    paging: str = "offset",     # offset | cursor
+    cursor: str = ""
 ):
     role = normalize_text(role, "lower")              # ✅ ADDED
     department = normalize_text(department, "upper")  # ✅ ADDED
     year = normalize_text(year, "upper")              # ✅ ADDED
     division = normalize_text(division, "upper")      # ✅ ADDED
     batch = normalize_text(batch, "upper")            # ✅ ADDED
+    member_id = normalize_text(member_id, "upper")
 
     if role not in ["student", "teacher"]:
         raise HTTPException(status_code=400, detail="Invalid role")
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
     conditions = []
     params = []
 
+    if not include_inactive:
+        conditions.append("active = 1")
+
+    if member_id:
+        conditions.append(("student_id" if role == "student" else "teacher_id") + " = %s")
+        params.append(member_id)
+
     if department:
         conditions.append("department = %s")
         params.append(department)
@@ -62,80 +136,157 @@ def get_members(
             conditions.append("batch = %s")
             params.append(batch)
 
-    where_clause = ""
-    if conditions:
-        where_clause = "WHERE " + " AND ".join(conditions)
+    table = "students" if role == "student" else "teachers"
+    count_query = f"SELECT COUNT(*) AS total FROM {table} {where(conditions)}"
+
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+
+    try:
+        if paging == "cursor" or cursor:
+            rows, next_cursor, prev_cursor = fetch_members_page(
+                cur, role, conditions, params, page_size, cursor
+            )
+            total = cached_total(cur, count_query, params)
+            return {
+                "data": rows,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+                "total": total,
+                "total_pages": max(1, math.ceil(total / page_size))
+            }
+
+        cur.execute(count_query, params)
+        total = cur.fetchone()["total"]
+        members_count_cache.put(json.dumps([count_query, params]), total)
+        total_pages = max(1, (total + page_size - 1) // page_size)
+        offset = (page - 1) * page_size
+
+        id_col = "student_id" if role == "student" else "teacher_id"
+        cur.execute(
+            f"""
+            SELECT {MEMBER_COLUMNS[role]}
+            FROM {table}
+            {where(conditions)}
+            ORDER BY {id_col}
+            LIMIT %s OFFSET %s
+            """,
+            params + [page_size, offset]
+        )
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    return {
+        "data": rows,
+        "total_pages": total_pages
+    }
+
 
+def cached_total(cur, count_query, params):
+    """
+    Last COUNT(*) for these filters. Counted inline only the first time;
+    stale entries are refreshed in the background.
+    """
+    key = json.dumps([count_query, params])
+
+    def compute():
+        conn = get_db_connection()
+        try:
+            c = conn.cursor(dictionary=True)
+            c.execute(count_query, params)
+            return c.fetchone()["total"]
+        finally:
+            conn.close()
+
+    total, fresh = members_count_cache.get(key)
+    if total is None:
+        cur.execute(count_query, params)
+        total = cur.fetchone()["total"]
+        members_count_cache.put(key, total)
+    elif not fresh:
+        members_count_cache.refresh_async(key, compute)
+    return total
+
+
+def fetch_members_page(cur, role, conditions, params, page_size, cursor=""):
+    """
+    Keyset page over the primary key, so a deep page costs the same as
+    the first. When the filters pin every column of idx_students_class
+    (department for idx_teachers_department), InnoDB reads that index
+    already in id order because the primary key is appended to it; with
+    fewer filters MySQL sorts the matching rows before the LIMIT.
+    `active` is checked on the row.
+    """
     table = "students" if role == "student" else "teachers"
     id_col = "student_id" if role == "student" else "teacher_id"
 
-    cur.execute(
-        f"SELECT COUNT(*) AS total FROM {table} {where_clause}",
-        params
-    )
-    total = cur.fetchone()["total"]
-    total_pages = max(1, (total + page_size - 1) // page_size)
-    offset = (page - 1) * page_size
+    conditions = list(conditions)
+    params = list(params)
+    direction = "next"
 
+    if cursor:
+        cursor_id, direction = decode_cursor(cursor)
+        conditions.append(f"{id_col} {'>' if direction == 'next' else '<'} %s")
+        params.append(cursor_id)
+
+    order = "ASC" if direction == "next" else "DESC"
+
+    # one extra row tells us whether another page exists
     cur.execute(
         f"""
-        SELECT *
+        SELECT {MEMBER_COLUMNS[role]}
         FROM {table}
-        {where_clause}
-        ORDER BY {id_col}
-        LIMIT %s OFFSET %s
+        {where(conditions)}
+        ORDER BY {id_col} {order}
+        LIMIT %s
         """,
-        params + [page_size, offset]
+        params + [page_size + 1]
     )
-
     rows = cur.fetchall()
-    conn.close()
 
-    return {
-        "data": rows,
-        "total_pages": total_pages
-    }
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if direction == "prev":
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    if direction == "next":
+        has_next, has_prev = has_more, bool(cursor)
+    else:
+        has_next, has_prev = True, has_more
+
+    next_cursor = encode_cursor(rows[-1][id_col], "next") if has_next else None
+    prev_cursor = encode_cursor(rows[0][id_col], "prev") if has_prev else None
+
+    return rows, next_cursor, prev_cursor
 
 
 # ======================================================
 # FILTER VALUES (DB DRIVEN)
 # ======================================================
 @router.get("/filters/{role}")
-def get_member_filters(role: str):
+def get_member_filters(role: str, request: Request):
     role = normalize_text(role, "lower")   # ✅ ADDED
 
     if role not in ["student", "teacher"]:
         raise HTTPException(status_code=400, detail="Invalid role")
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
     if role == "teacher":
-        cur.execute("SELECT DISTINCT department FROM teachers ORDER BY department")
-        data = {"departments": [r["department"] for r in cur.fetchall()]}
+        data = {"departments": metadata_cache.teacher_departments()}
 
     else:
-        cur.execute("SELECT DISTINCT department FROM students ORDER BY department")
-        departments = [r["department"] for r in cur.fetchall()]
-
-        cur.execute("SELECT DISTINCT year FROM students ORDER BY year")
-        years = [r["year"] for r in cur.fetchall()]
-
-        cur.execute("SELECT DISTINCT division FROM students ORDER BY division")
-        divisions = [r["division"] for r in cur.fetchall()]
-
-        cur.execute("SELECT DISTINCT batch FROM students ORDER BY batch")
-        batches = [r["batch"] for r in cur.fetchall()]
-
         data = {
-            "departments": departments,
-            "years": years,
-            "divisions": divisions,
-            "batches": batches
+            "departments": metadata_cache.student_values("department"),
+            "years": metadata_cache.student_values("year"),
+            "divisions": metadata_cache.student_values("division"),
+            "batches": metadata_cache.student_values("batch")
         }
 
-    conn.close()
-    return data
+    return metadata_cache.etag_response(request, data)
 
 
 # ======================================================
@@ -183,39 +334,71 @@ def add_member(
                     detail="Year, division and batch are required for student"
                 )
 
-            cur.execute("SELECT 1 FROM students WHERE student_id=%s", (member_id,))
-            if cur.fetchone():
+            cur.execute("SELECT active FROM students WHERE student_id=%s", (member_id,))
+            existing = cur.fetchone()
+            if existing and existing[0]:
                 raise HTTPException(status_code=400, detail="Student ID already exists")
 
-            cur.execute("""
-                INSERT INTO students
-                (student_id, name, department, year, division, batch, email, contact_no)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-            """, (
-                member_id, name, department,
-                year, division, batch,
-                email, contact_no
-            ))
+            if existing:
+                # deactivated by a roster sync: re-adding brings it back
+                cur.execute("""
+                    UPDATE students
+                    SET name=%s, department=%s, year=%s, division=%s,
+                        batch=%s, email=%s, contact_no=%s, active=1
+                    WHERE student_id=%s
+                """, (
+                    name, department, year, division, batch,
+                    email, contact_no, member_id
+                ))
+            else:
+                cur.execute("""
+                    INSERT INTO students
+                    (student_id, name, department, year, division, batch, email, contact_no)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+                """, (
+                    member_id, name, department,
+                    year, division, batch,
+                    email, contact_no
+                ))
 
         else:
             if not designation:
                 raise HTTPException(status_code=400, detail="Designation required")
 
-            cur.execute("SELECT 1 FROM teachers WHERE teacher_id=%s", (member_id,))
-            if cur.fetchone():
+            cur.execute("SELECT active FROM teachers WHERE teacher_id=%s", (member_id,))
+            existing = cur.fetchone()
+            if existing and existing[0]:
                 raise HTTPException(status_code=400, detail="Teacher ID already exists")
 
-            cur.execute("""
-                INSERT INTO teachers
-                (teacher_id, name, department, email, contact_no, designation)
-                VALUES (%s,%s,%s,%s,%s,%s)
-            """, (
-                member_id, name, department,
-                email, contact_no, designation
-            ))
+            if existing:
+                cur.execute("""
+                    UPDATE teachers
+                    SET name=%s, department=%s, email=%s, contact_no=%s,
+                        designation=%s, active=1
+                    WHERE teacher_id=%s
+                """, (
+                    name, department, email, contact_no,
+                    designation, member_id
+                ))
+            else:
+                cur.execute("""
+                    INSERT INTO teachers
+                    (teacher_id, name, department, email, contact_no, designation)
+                    VALUES (%s,%s,%s,%s,%s,%s)
+                """, (
+                    member_id, name, department,
+                    email, contact_no, designation
+                ))
 
         conn.commit()
 
+        member_directory.put(
+            role, member_id, name, department,
+            year=year, division=division, batch=batch, email=email
+        )
+        metadata_cache.invalidate()
+        members_count_cache.clear()
+
     except HTTPException:
         conn.rollback()
         raise
@@ -225,92 +408,96 @@ def add_member(
     finally:
         conn.close()
 
-    return {"status": "success"}
+    return {"status": "success", "reactivated": bool(existing)}
 
 
 # ======================================================
-# BULK UPLOAD (CSV – SKIP DUPLICATES)
+# BULK UPLOAD (CSV – SKIP DUPLICATES, OR SYNC ROSTER)
 # ======================================================
 @router.post("/upload")
 def upload_members(
     role: str = Form(...),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    mode: str = Form("insert"),
+    deactivate_missing: bool = Form(False)
 ):
     role = normalize_text(role, "lower")  # ✅ ADDED
+    mode = normalize_text(mode, "lower")
 
     if role not in ["student", "teacher"]:
         raise HTTPException(status_code=400, detail="Invalid role")
 
+    if mode not in ["insert", "sync"]:
+        raise HTTPException(status_code=400, detail="Invalid mode")
+
     conn = get_db_connection()
     cur = conn.cursor()
+    id_col = "student_id" if role == "student" else "teacher_id"
 
-    content = file.file.read().decode("utf-8")
-    reader = csv.DictReader(io.StringIO(content))
+    # chunks are committed as they go (memory stays flat), so a failed
+    # upload reports what was already saved; re-sending the same file is
+    # safe because written rows are skipped (insert) or unchanged (sync)
+    committed = {"rows": 0, "deactivated": 0}
 
-    added = 0
-    skipped = 0
+    def apply_chunk(upserted, deactivated_ids):
+        # each chunk is committed before it reaches the directory, so
+        # scans never see rows that could still roll back
+        conn.commit()
+        committed["rows"] += len(upserted)
+        committed["deactivated"] += len(deactivated_ids)
+        for row in upserted:
+            member_directory.put(
+                role, row[id_col], row["name"], row["department"],
+                year=row.get("year"), division=row.get("division"),
+                batch=row.get("batch"), email=row.get("email")
+            )
+        for member_id in deactivated_ids:
+            member_directory.remove(member_id, role)
 
     try:
-        for row in reader:
-            try:
-                if role == "student":
-                    row["student_id"] = normalize_text(row["student_id"], "upper")
-                    row["department"] = normalize_text(row["department"], "upper")
-                    row["year"] = normalize_text(row["year"], "upper")
-                    row["division"] = normalize_text(row["division"], "upper")
-                    row["batch"] = normalize_text(row["batch"], "upper")
-                    row["email"] = normalize_text(row["email"], "lower")
-
-                    cur.execute("SELECT 1 FROM students WHERE student_id=%s", (row["student_id"],))
-                    if cur.fetchone():
-                        skipped += 1
-                        continue
-
-                    cur.execute("""
-                        INSERT INTO students
-                        (student_id, name, department, year, division, batch, email, contact_no)
-                        VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-                    """, (
-                        row["student_id"], row["name"], row["department"],
-                        row["year"], row["division"], row["batch"],
-                        row["email"], row["contact_no"]
-                    ))
-                else:
-                    row["teacher_id"] = normalize_text(row["teacher_id"], "upper")
-                    row["department"] = normalize_text(row["department"], "upper")
-                    row["email"] = normalize_text(row["email"], "lower")
-                    row["designation"] = normalize_text(row["designation"], "title")
-
-                    cur.execute("SELECT 1 FROM teachers WHERE teacher_id=%s", (row["teacher_id"],))
-                    if cur.fetchone():
-                        skipped += 1
-                        continue
-
-                    cur.execute("""
-                        INSERT INTO teachers
-                        (teacher_id, name, department, email, contact_no, designation)
-                        VALUES (%s,%s,%s,%s,%s,%s)
-                    """, (
-                        row["teacher_id"], row["name"], row["department"],
-                        row["email"], row["contact_no"], row["designation"]
-                    ))
-
-                added += 1
-            except:
-                skipped += 1
-
+        if mode == "sync":
+            result = sync_members(
+                cur, role, iter_csv_upload(file),
+                deactivate_missing=deactivate_missing,
+                on_chunk=apply_chunk
+            )
+        else:
+            result = import_members(cur, role, iter_csv_upload(file), on_chunk=apply_chunk)
         conn.commit()
 
     except Exception as e:
         conn.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
+        detail = str(e)
+        if committed["rows"] or committed["deactivated"]:
+            detail += (
+                f" ({committed['rows']} rows saved, {committed['deactivated']} deactivated"
+                " before the error; upload the same file again to finish)"
+            )
+        raise HTTPException(status_code=400, detail=detail)
     finally:
         conn.close()
+        # earlier chunks may be committed even when the upload failed
+        metadata_cache.invalidate()
+        members_count_cache.clear()
+
+    if mode == "sync":
+        return {
+            "status": "success",
+            "mode": "sync",
+            "added": result["added"],
+            "updated": result["updated"],
+            "unchanged": result["unchanged"],
+            "deactivated": result["deactivated"],
+            "skipped": result["skipped"],
+            "diff": result["sample"],     # first IDs of each list
+            "errors": result["errors"]
+        }
 
     return {
         "status": "success",
-        "added": added,
-        "skipped": skipped
+        "added": result["added"],
+        "skipped": result["skipped"],
+        "errors": result["errors"]
     }
 
 
@@ -354,10 +541,11 @@ def update_member(
     try:
         if role == "student":
             cur.execute(
-                "SELECT 1 FROM students WHERE student_id=%s",
+                "SELECT active FROM students WHERE student_id=%s",
                 (member_id,)
             )
-            if not cur.fetchone():
+            existing = cur.fetchone()
+            if not existing:
                 raise HTTPException(status_code=404, detail="Student not found")
 
             if not (year and division and batch):
@@ -383,10 +571,11 @@ def update_member(
 
         else:
             cur.execute(
-                "SELECT 1 FROM teachers WHERE teacher_id=%s",
+                "SELECT active FROM teachers WHERE teacher_id=%s",
                 (member_id,)
             )
-            if not cur.fetchone():
+            existing = cur.fetchone()
+            if not existing:
                 raise HTTPException(status_code=404, detail="Teacher not found")
 
             if not designation:
@@ -411,6 +600,17 @@ def update_member(
 
         conn.commit()
 
+        # deactivated members stay out of the directory (scans reject them)
+        if existing[0]:
+            member_directory.put(
+                role, member_id, name, department,
+                year=year, division=division, batch=batch, email=email
+            )
+        else:
+            member_directory.remove(member_id, role)
+        metadata_cache.invalidate()
+        members_count_cache.clear()
+
     except HTTPException:
         conn.rollback()
         raise
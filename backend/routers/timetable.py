@@ -1,6 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request
 from database import get_db_connection
-import csv, io
+from utils import iter_csv_upload
+from batch_writer import BATCH_SIZE, write_batch
+from timetable_clash import ClashChecker, TEACHER_CLASH
+import timetable_index
+import timetable_snapshot
+import metadata_cache
 
 router = APIRouter(prefix="/admin/timetable", tags=["Timetable"])
 
@@ -19,19 +24,11 @@ def normalize_time(t):
         m = parts[1][:2]
         return f"{h}:{m}"
     
-def to_12_hour(time_str):
-    """
-    Converts 'HH:MM' -> 'HH:MM AM/PM'
-    """
-    h, m = map(int, time_str.split(":"))
-    ampm = "AM" if h < 12 else "PM"
-    h = h % 12 or 12
-    return f"{h:02d}:{m:02d} {ampm}"
-
 
 
 @router.get("/")
 def get_timetable(
+    request: Request,
     role: str = Query(None),            # student / teacher
     department: str = Query(None),
     year: str = Query(None),
@@ -40,55 +37,12 @@ def get_timetable(
     teacher_id: str = Query(None),
     day_of_week: str = Query(None)
 ):
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    query = "SELECT * FROM timetable WHERE 1=1"
-    params = []
-
-    if role == "student":
-        if department:
-            query += " AND department=%s"
-            params.append(department)
-        if year:
-            query += " AND year=%s"
-            params.append(year)
-        if division:
-            query += " AND division=%s"
-            params.append(division)
-
-        # lecture → batch NULL | practical → batch match
-        if batch:
-            query += " AND (batch IS NULL OR batch=%s)"
-            params.append(batch)
-
-    elif role == "teacher" and teacher_id:
-        query += " AND teacher_id=%s"
-        params.append(teacher_id)
-
-    if day_of_week:
-        day_of_week = day_of_week.strip().capitalize()
-        query += " AND day_of_week=%s"
-        params.append(day_of_week)
-
-    query += " ORDER BY day_of_week, start_time"
-
-    cur.execute(query, params)
-    data = cur.fetchall()
-
-    # 🔧 NORMALIZE TIME FORMAT FOR FRONTEND
-    for row in data:
-        # normalize to HH:MM first
-        start = normalize_time(row["start_time"])
-        end = normalize_time(row["end_time"])
-
-        # convert to 12-hour
-        row["start_time"] = to_12_hour(start)
-        row["end_time"] = to_12_hour(end)
-
-
-    conn.close()
-    return data
+    # compiled once per timetable change; see timetable_snapshot
+    body, etag = timetable_snapshot.view(
+        role=role, department=department, year=year, division=division,
+        batch=batch, teacher_id=teacher_id, day_of_week=day_of_week
+    )
+    return metadata_cache.rendered_response(request, body, etag)
 
 
 # ======================================================
@@ -128,27 +82,16 @@ def add_timetable_entry(
     if type == "Lecture":
         batch = None
 
-    # ---------- CLASS CLASH ----------
-    cur.execute("""
-        SELECT 1 FROM timetable
-        WHERE department=%s AND year=%s AND division=%s
-          AND day_of_week=%s
-          AND (%s < end_time AND %s > start_time)
-          AND (batch IS NULL OR batch=%s)
-    """, (department, year, division, day_of_week, start_time, end_time, batch))
-
-    if cur.fetchone():
-        raise HTTPException(status_code=400, detail="Class timetable clash detected")
-
-    # ---------- TEACHER CLASH ----------
-    cur.execute("""
-        SELECT 1 FROM timetable
-        WHERE teacher_id=%s AND day_of_week=%s
-          AND (%s < end_time AND %s > start_time)
-    """, (teacher_id, day_of_week, start_time, end_time))
-
-    if cur.fetchone():
-        raise HTTPException(status_code=400, detail="Teacher already assigned in this slot")
+    # ---------- CLASS / TEACHER CLASH ----------
+    slot = {
+        "department": department, "year": year, "division": division,
+        "batch": batch, "teacher_id": teacher_id, "day_of_week": day_of_week,
+        "start_time": start_time, "end_time": end_time
+    }
+    clash = ClashChecker.load_for(cur, slot).conflict(slot)
+    if clash:
+        conn.close()
+        raise HTTPException(status_code=400, detail=clash)
 
     # ---------- INSERT ----------
     cur.execute("""
@@ -164,98 +107,114 @@ def add_timetable_entry(
 
     conn.commit()
     conn.close()
+    timetable_index.invalidate()
+    timetable_snapshot.invalidate()
+    metadata_cache.invalidate()
     return {"status": "success"}
 
 
 # ======================================================
 # BULK UPLOAD TIMETABLE
 # ======================================================
+INSERT_TIMETABLE_QUERY = """
+    INSERT INTO timetable
+    (department, year, division, batch, subject,
+    teacher_id, day_of_week, start_time, end_time, type)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+"""
+
+
 @router.post("/upload")
 def upload_timetable(file: UploadFile = File(...)):
     conn = get_db_connection()
     cur = conn.cursor()
 
-    content = file.file.read().decode("utf-8")
-    reader = csv.DictReader(io.StringIO(content))
-
     valid_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+    errors = []
+    pending = []
     added = 0
-    skipped = 0
-
-    for row in reader:
-        try:
-            day_of_week = row["day_of_week"].strip().capitalize()
-            start_time = normalize_time(row["start_time"])
-            end_time = normalize_time(row["end_time"])
-            type = row["type"]
-            batch = row.get("batch")
-
-            if day_of_week not in valid_days:
-                skipped += 1
-                continue
-
-            if type not in ["Lecture", "Practical"]:
-                skipped += 1
-                continue
 
-            if start_time >= end_time:
-                skipped += 1
+    try:
+        # existing slots + every row accepted so far, so clashes inside
+        # the file are caught regardless of row order
+        checker = ClashChecker.load_all(cur)
+
+        for line_no, row in enumerate(iter_csv_upload(file), start=2):
+            try:
+                day_of_week = row["day_of_week"].strip().capitalize()
+                start_time = normalize_time(row["start_time"])
+                end_time = normalize_time(row["end_time"])
+                type = row["type"]
+                batch = row.get("batch")
+
+                if day_of_week not in valid_days:
+                    raise ValueError("Invalid day_of_week")
+
+                if type not in ["Lecture", "Practical"]:
+                    raise ValueError("Invalid class type")
+
+                if start_time >= end_time:
+                    raise ValueError("End time must be after start time")
+
+                if type == "Practical" and not batch:
+                    raise ValueError("Batch required for practical")
+
+                if type == "Lecture":
+                    batch = None   # ✅ THIS WAS MISSING
+
+                slot = {
+                    "department": row["department"], "year": row["year"],
+                    "division": row["division"], "batch": batch,
+                    "teacher_id": row["teacher_id"], "day_of_week": day_of_week,
+                    "start_time": start_time, "end_time": end_time
+                }
+                clash = checker.conflict(slot)
+                if clash:
+                    raise ValueError(clash)
+
+                values = (
+                    row["department"], row["year"], row["division"],
+                    batch, row["subject"], row["teacher_id"],
+                    day_of_week, start_time, end_time, type
+                )
+
+            except KeyError as e:
+                errors.append({"row": line_no, "reason": f"Missing column: {e.args[0]}"})
                 continue
-
-            if type == "Practical" and not batch:
-                skipped += 1
+            except Exception as e:
+                errors.append({"row": line_no, "reason": str(e)})
                 continue
 
-            if type == "Lecture":
-                batch = None   # ✅ THIS WAS MISSING
-
-            # class clash
-            cur.execute("""
-                SELECT 1 FROM timetable
-                WHERE department=%s AND year=%s AND division=%s
-                AND day_of_week=%s
-                AND (%s < end_time AND %s > start_time)
-                AND (batch IS NULL OR batch=%s)
-            """, (
-                row["department"], row["year"], row["division"],
-                day_of_week, start_time, end_time, batch
-            ))
-
-            if cur.fetchone():
-                skipped += 1
-                continue
+            checker.add(slot)
+            pending.append((line_no, values))
 
-            # teacher clash
-            cur.execute("""
-                SELECT 1 FROM timetable
-                WHERE teacher_id=%s AND day_of_week=%s
-                AND (%s < end_time AND %s > start_time)
-            """, (row["teacher_id"], day_of_week, start_time, end_time))
+            # rows MySQL still rejects (too long, unknown teacher) are
+            # reported per row instead of failing the upload
+            if len(pending) >= BATCH_SIZE:
+                added += len(write_batch(cur, INSERT_TIMETABLE_QUERY, pending, errors))
+                pending = []
 
-            if cur.fetchone():
-                skipped += 1
-                continue
+        if pending:
+            added += len(write_batch(cur, INSERT_TIMETABLE_QUERY, pending, errors))
+        conn.commit()
 
-            cur.execute("""
-                INSERT INTO timetable
-                (department, year, division, batch, subject,
-                teacher_id, day_of_week, start_time, end_time, type)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            """, (
-                row["department"], row["year"], row["division"],
-                batch, row["subject"], row["teacher_id"],
-                day_of_week, start_time, end_time, type
-            ))
-
-            added += 1
-
-        except Exception:
-            skipped += 1
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
 
+    errors.sort(key=lambda e: e["row"])
 
-    conn.commit()
-    conn.close()
-    return {"status": "success", "added": added, "skipped": skipped}
+    timetable_index.invalidate()
+    timetable_snapshot.invalidate()
+    metadata_cache.invalidate()
+    return {
+        "status": "success",
+        "added": added,
+        "skipped": len(errors),
+        "errors": errors
+    }
 
 
 @router.put("/update/{timetable_id}")
@@ -299,33 +258,19 @@ def update_timetable_entry(
     if type == "Lecture":
         batch = None
 
-    # class clash
-    cur.execute("""
-        SELECT 1 FROM timetable
-        WHERE timetable_id != %s
-          AND department=%s AND year=%s AND division=%s
-          AND day_of_week=%s
-          AND (%s < end_time AND %s > start_time)
-          AND (batch IS NULL OR batch=%s)
-    """, (
-        timetable_id, department, year, division,
-        day_of_week, start_time, end_time, batch
-    ))
-    if cur.fetchone():
-        raise HTTPException(status_code=400, detail="Class timetable clash detected")
-
-    # teacher clash
-    cur.execute("""
-        SELECT 1 FROM timetable
-        WHERE timetable_id != %s
-          AND teacher_id=%s AND day_of_week=%s
-          AND (%s < end_time AND %s > start_time)
-    """, (
-        timetable_id, teacher_id, day_of_week,
-        start_time, end_time
-    ))
-    if cur.fetchone():
-        raise HTTPException(status_code=400, detail="Teacher timetable clash detected")
+    # class / teacher clash (ignoring the row being edited)
+    slot = {
+        "department": department, "year": year, "division": division,
+        "batch": batch, "teacher_id": teacher_id, "day_of_week": day_of_week,
+        "start_time": start_time, "end_time": end_time
+    }
+    clash = ClashChecker.load_for(cur, slot).conflict(slot, ignore_id=timetable_id)
+    if clash:
+        conn.close()
+        raise HTTPException(
+            status_code=400,
+            detail="Teacher timetable clash detected" if clash == TEACHER_CLASH else clash
+        )
 
     # update
     cur.execute("""
@@ -342,6 +287,9 @@ def update_timetable_entry(
 
     conn.commit()
     conn.close()
+    timetable_index.invalidate()
+    timetable_snapshot.invalidate()
+    metadata_cache.invalidate()
     return {"status": "success", "message": "Timetable updated successfully"}
 
 
@@ -350,44 +298,38 @@ def update_timetable_entry(
 # ======================================================
 @router.get("/filters")
 def get_timetable_filters(
+    request: Request,
     department: str = Query(None),
     year: str = Query(None),
     division: str = Query(None)
 ):
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("SELECT DISTINCT department FROM timetable ORDER BY department")
-    departments = [r["department"] for r in cur.fetchall()]
+    departments = metadata_cache.timetable_values("department")
 
     years = []
     if department:
-        cur.execute("SELECT DISTINCT year FROM timetable WHERE department=%s", (department,))
-        years = [r["year"] for r in cur.fetchall()]
+        years = metadata_cache.timetable_values("year", department=department)
 
     divisions = []
     if department and year:
-        cur.execute(
-            "SELECT DISTINCT division FROM timetable WHERE department=%s AND year=%s",
-            (department, year)
+        divisions = metadata_cache.timetable_values(
+            "division", department=department, year=year
         )
-        divisions = [r["division"] for r in cur.fetchall()]
 
     batches = []
     if department and year and division:
-        cur.execute("""
-            SELECT DISTINCT batch FROM timetable
-            WHERE department=%s AND year=%s AND division=%s AND batch IS NOT NULL
-        """, (department, year, division))
-        batches = [r["batch"] for r in cur.fetchall()]
-
-    conn.close()
-    return {
+        batches = [
+            b for b in metadata_cache.timetable_values(
+                "batch", department=department, year=year, division=division
+            )
+            if b is not None
+        ]
+
+    return metadata_cache.etag_response(request, {
         "departments": departments,
         "years": years,
         "divisions": divisions,
         "batches": batches
-    }
+    })
 
 # ======================================================
 # DELETE TIMETABLE ENTRY
@@ -412,5 +354,8 @@ def delete_timetable_entry(timetable_id: int):
 
     conn.commit()
     conn.close()
+    timetable_index.invalidate()
+    timetable_snapshot.invalidate()
+    metadata_cache.invalidate()
 
     return {"status": "success", "message": "Timetable entry deleted"}
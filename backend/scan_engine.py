@@ -0,0 +1,117 @@
+from datetime import datetime
+from database import db_connection
+import member_directory
+import presence
+import timetable_index
+import calendar_index
+import email_outbox
+import rollup
+import occupancy
+import live_events
+import metrics
+
+
+# ======================================================
+# QUERIES
+# ======================================================
+# Member comes from the in-memory directory, holidays from the calendar
+# index and the running lecture from the in-memory timetable index;
+# only the presence lookup and the log write touch MySQL.
+INSERT_LOG_QUERY = """
+    INSERT INTO logs
+    (user_id, scan_time, action, status, matched_subject, matched_teacher_id)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+# ======================================================
+# PROCESS SCAN
+# ======================================================
+def process_scan(user_id):
+    """
+    Resolves a badge from the member directory and writes its log row
+    in one transaction on a single pooled connection. A known member
+    costs six round trips: the presence ensure + locking SELECT, the
+    log INSERT, the member_presence and hourly rollup upserts, and the
+    COMMIT (plus the outbox row on SKIP; a directory miss adds a
+    lookup).
+    Returns None for unknown IDs.
+    """
+    now = datetime.now().replace(microsecond=0)
+
+    with db_connection() as conn:
+        cur = conn.cursor(dictionary=True)
+
+        member = member_directory.lookup(user_id, cur)
+        if member is None:
+            return None
+
+        last_action = presence.get_last_action(cur, user_id)
+        next_action = "EXIT" if last_action == "ENTRY" else "ENTRY"
+
+        status = "NORMAL"
+        matched_subject = None
+        matched_teacher_id = None
+
+        # 🔍 Check SKIP only on student ENTRY, and only on teaching days
+        if (
+            member.role == "student"
+            and next_action == "ENTRY"
+            and not calendar_index.non_teaching(now)
+        ):
+            lecture = timetable_index.current_lecture(
+                member.department, member.year,
+                member.division, member.batch, now
+            )
+            if lecture:
+                status = "SKIP"
+                matched_subject = lecture["subject"]
+                matched_teacher_id = lecture["teacher_id"]
+
+        cur.execute(INSERT_LOG_QUERY, (
+            user_id, now, next_action, status,
+            matched_subject, matched_teacher_id
+        ))
+        log_id = cur.lastrowid
+        presence.record(cur, user_id, next_action, log_id, now)
+        rollup.record(cur, now, member.department, member.role, next_action, status)
+
+        # 📧 Queue the alert in the same transaction; a worker sends it
+        queued = False
+        if status == "SKIP" and matched_teacher_id:
+            teacher = member_directory.lookup(matched_teacher_id, cur)
+            if teacher and teacher.email:
+                email_outbox.enqueue_skip_email(
+                    cur, log_id,
+                    teacher_email=teacher.email,
+                    teacher_name=teacher.name,
+                    student_name=member.name,
+                    subject=matched_subject,
+                    scan_time=now
+                )
+                queued = True
+
+        conn.commit()
+
+    occupancy.record(user_id, next_action, member.department, member.role)
+    metrics.record_log(next_action, status)
+    live_events.publish_log(
+        log_id, user_id, member.name, member.role, member.department,
+        next_action, status, matched_subject, now
+    )
+
+    if queued:
+        email_outbox.notify()
+
+    return {
+        "log_id": log_id,
+        "user_id": user_id,
+        "role": member.role,
+        "name": member.name,
+        "department": member.department,
+        "action": next_action,
+        "status": status,
+        "matched_subject": matched_subject,
+        "matched_teacher_id": matched_teacher_id,
+        "scan_time": now
+    }
@@ -0,0 +1,71 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+from fastapi import HTTPException, Request
+
+TOKEN_TTL_SECONDS = int(os.getenv("ADMIN_TOKEN_TTL", str(8 * 3600)))
+
+_secret = os.getenv("ADMIN_TOKEN_SECRET", "").encode()
+if not _secret:
+    # fine for one worker; set ADMIN_TOKEN_SECRET when running several
+    print("⚠️ ADMIN_TOKEN_SECRET not set, admin sessions end on restart")
+    _secret = secrets.token_bytes(32)
+
+
+# ======================================================
+# SIGNED SESSION TOKENS
+# ======================================================
+# base64(payload).base64(HMAC-SHA256(payload)); checking one is a hash
+# compare, so admin requests never go back to bcrypt or MySQL.
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return _b64(hmac.new(_secret, payload.encode(), hashlib.sha256).digest())
+
+
+def issue(username, role):
+    payload = _b64(json.dumps({
+        "sub": username,
+        "role": role,
+        "exp": int(time.time()) + TOKEN_TTL_SECONDS
+    }).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify(token):
+    """Claims dict for a valid, unexpired token, else None."""
+    try:
+        payload, signature = token.split(".", 1)
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        claims = json.loads(_unb64(payload))
+        if claims["exp"] < time.time():
+            return None
+        return claims
+    except Exception:
+        return None
+
+
+def require_admin(request: Request):
+    """
+    Router dependency. Takes 'Authorization: Bearer <token>', or
+    ?token= for EventSource, which cannot send headers.
+    """
+    header = request.headers.get("authorization", "")
+    token = header[7:] if header.lower().startswith("bearer ") else request.query_params.get("token", "")
+
+    claims = verify(token) if token else None
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return claims
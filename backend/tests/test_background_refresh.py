@@ -0,0 +1,120 @@
+import threading
+import time
+
+import background_refresh
+from background_refresh import BackgroundRefresh
+
+
+def wait_idle(refresh, timeout=2):
+    deadline = time.monotonic() + timeout
+    while refresh._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_get_does_not_wait_for_a_slow_rebuild():
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(2)
+        return "built"
+
+    refresh = BackgroundRefresh("test", load, ttl=300)
+    started = time.monotonic()
+    for _ in range(20):
+        assert refresh.get() is None
+    assert time.monotonic() - started < 0.5
+
+    release.set()
+    wait_idle(refresh)
+    assert len(calls) == 1          # single flight
+    assert refresh.get() == "built"
+    assert not refresh.dirty
+
+
+def test_failed_rebuild_keeps_old_value_and_stays_dirty(monkeypatch):
+    values = iter(["v1", None])
+    refresh = BackgroundRefresh("test", lambda: next(values), ttl=300)
+    assert refresh.rebuild()
+
+    refresh.invalidate()
+    assert refresh.get() == "v1"
+    wait_idle(refresh)
+    assert refresh.get() == "v1"
+    assert refresh.dirty
+
+
+def test_failed_rebuild_is_retried_after_a_pause(monkeypatch):
+    monkeypatch.setattr(background_refresh, "RETRY_SECONDS", 60)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return None
+
+    refresh = BackgroundRefresh("test", load, ttl=300)
+    refresh.get()
+    wait_idle(refresh)
+    refresh.get()
+    wait_idle(refresh)
+    assert len(calls) == 1
+
+    refresh.invalidate()            # a write clears the pause
+    refresh.get()
+    wait_idle(refresh)
+    assert len(calls) == 2
+
+
+def test_load_exception_counts_as_failure():
+    def load():
+        raise RuntimeError("db down")
+
+    refresh = BackgroundRefresh("test", load, ttl=300)
+    assert refresh.rebuild() is False
+    assert refresh.dirty
+
+
+def test_invalidate_during_load_leaves_result_dirty():
+    refresh = None
+
+    def load():
+        refresh.invalidate()        # a write lands while we read
+        return "v1"
+
+    refresh = BackgroundRefresh("test", load, ttl=300)
+    assert refresh.rebuild()
+    assert refresh.value == "v1"
+    assert refresh.dirty
+
+
+def test_wait_rebuilds_before_returning():
+    versions = iter(["v1", "v2"])
+    refresh = BackgroundRefresh("test", lambda: next(versions), ttl=300)
+    assert refresh.get(wait=True) == "v1"
+    assert refresh.get(wait=True) == "v1"       # fresh: no reload
+    refresh.invalidate()
+    assert refresh.get(wait=True) == "v2"
+
+
+def test_concurrent_waiters_share_one_rebuild():
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(2)
+        return "built"
+
+    refresh = BackgroundRefresh("test", load, ttl=300)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(refresh.get(wait=True))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(2)
+
+    assert results == ["built"] * 5
+    assert len(calls) == 1
@@ -0,0 +1,46 @@
+from batch_writer import write_batch
+
+
+class FakeCursor:
+    """Rejects any row whose first value is 'BAD', like MySQL would."""
+
+    def __init__(self):
+        self.statements = []
+        self.rows = []
+
+    def execute(self, query, params=None):
+        if params is None:
+            self.statements.append(query)
+            return
+        if params[0] == "BAD":
+            raise ValueError("Data too long")
+        self.rows.append(params)
+
+    def executemany(self, query, seq):
+        seq = list(seq)
+        if any(params[0] == "BAD" for params in seq):
+            raise ValueError("Data too long")
+        self.rows.extend(seq)
+
+
+def test_clean_batch_is_one_executemany():
+    cur = FakeCursor()
+    errors = []
+    batch = [(2, ("A",)), (3, ("B",))]
+    assert write_batch(cur, "INSERT", batch, errors) == batch
+    assert errors == []
+    assert cur.rows == [("A",), ("B",)]
+    assert cur.statements == ["SAVEPOINT bulk_batch", "RELEASE SAVEPOINT bulk_batch"]
+
+
+def test_bad_row_falls_back_to_per_row_inserts():
+    cur = FakeCursor()
+    errors = []
+    batch = [(2, ("A",)), (3, ("BAD",)), (4, ("C",))]
+
+    written = write_batch(cur, "INSERT", batch, errors, lambda values: {"id": values[0]})
+
+    assert written == [(2, ("A",)), (4, ("C",))]
+    assert cur.rows == [("A",), ("C",)]
+    assert errors == [{"row": 3, "id": "BAD", "reason": "Data too long"}]
+    assert "ROLLBACK TO SAVEPOINT bulk_batch" in cur.statements
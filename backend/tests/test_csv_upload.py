@@ -0,0 +1,32 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("passlib")
+
+from utils import iter_csv_upload
+
+
+def upload(raw):
+    return SimpleNamespace(file=io.BytesIO(raw))
+
+
+def test_rows_are_decoded_lazily_and_bom_is_dropped():
+    f = upload("\ufeffstudent_id,name\nS1,Asha\nS2,Ravi\n".encode("utf-8"))
+    rows = iter_csv_upload(f)
+    assert next(rows) == {"student_id": "S1", "name": "Asha"}
+    assert list(rows) == [{"student_id": "S2", "name": "Ravi"}]
+
+
+def test_quoted_newlines_and_non_ascii_survive():
+    f = upload('id,name\n1,"Patil,\nAsha"\n2,Śruti\n'.encode("utf-8"))
+    assert [r["name"] for r in iter_csv_upload(f)] == ["Patil,\nAsha", "Śruti"]
+
+
+def test_reads_from_the_start_and_leaves_the_file_open():
+    f = upload(b"id\n1\n")
+    f.file.read()
+    assert list(iter_csv_upload(f)) == [{"id": "1"}]
+    assert not f.file.closed
+    f.file.seek(0)
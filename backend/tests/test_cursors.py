@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("mysql.connector")
+pytest.importorskip("passlib")
+
+from fastapi import HTTPException
+
+from routers import logs, members
+
+
+def raw_cursor(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def test_logs_cursor_round_trip():
+    cursor = logs.encode_cursor(datetime(2026, 3, 1, 9, 5, 7), 42, "prev")
+    assert "=" not in cursor
+    assert logs.decode_cursor(cursor) == ("2026-03-01 09:05:07", 42, "prev")
+
+
+def test_members_cursor_round_trip():
+    cursor = members.encode_cursor("S101", "next")
+    assert members.decode_cursor(cursor) == ("S101", "next")
+
+
+@pytest.mark.parametrize("decode, bad", [
+    (logs.decode_cursor, "not base64 json"),
+    (logs.decode_cursor, raw_cursor({"t": "2026-03-01 09:00:00", "id": 1, "d": "sideways"})),
+    (logs.decode_cursor, raw_cursor({"t": "2026-03-01 09:00:00", "id": "x", "d": "next"})),
+    (members.decode_cursor, raw_cursor({"id": "S1"})),
+    (members.decode_cursor, ""),
+])
+def test_bad_cursors_are_a_400(decode, bad):
+    with pytest.raises(HTTPException) as exc:
+        decode(bad)
+    assert exc.value.status_code == 400
@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("mysql.connector")
+
+from routers import dashboard
+
+
+class FakeCursor:
+    def __init__(self, rollup_total, covered_from, first_log_date, log_count):
+        self.rows = {
+            dashboard.TOTAL_LOGS_QUERY: {
+                "total": rollup_total, "covered_from": covered_from,
+                "first_log_date": first_log_date
+            },
+            dashboard.COUNT_LOGS_QUERY: {"total": log_count}
+        }
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+
+    def fetchone(self):
+        return self.rows[self.queries[-1]]
+
+
+def test_backfilled_rollup_answers_alone():
+    cur = FakeCursor(120, date(2026, 1, 5), date(2026, 1, 5), 120)
+    assert dashboard.total_logs(cur) == 120
+    assert cur.queries == [dashboard.TOTAL_LOGS_QUERY]
+
+
+def test_rollup_missing_history_falls_back_to_counting_logs():
+    cur = FakeCursor(8, date(2026, 3, 1), date(2026, 1, 5), 5008)
+    assert dashboard.total_logs(cur) == 5008
+
+
+def test_empty_rollup_with_logs_falls_back():
+    cur = FakeCursor(0, None, date(2026, 1, 5), 42)
+    assert dashboard.total_logs(cur) == 42
+
+
+def test_no_logs_at_all():
+    cur = FakeCursor(0, None, None, 0)
+    assert dashboard.total_logs(cur) == 0
+    assert cur.queries == [dashboard.TOTAL_LOGS_QUERY]
@@ -0,0 +1,219 @@
+import email
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+pytest.importorskip("passlib")
+
+import email_outbox
+
+
+class FakeOutboxDB:
+    """email_outbox rows in a dict; understands the module's queries."""
+
+    def __init__(self):
+        self.rows = {}
+        self.next_id = 1
+
+    def add(self, to_email="t@x.com", body="hello", status="PENDING", attempts=0, due=None):
+        oid = self.next_id
+        self.next_id += 1
+        self.rows[oid] = {
+            "outbox_id": oid, "to_email": to_email, "subject": "Alert",
+            "body": body, "status": status, "attempts": attempts,
+            "next_attempt_at": due or datetime.now() - timedelta(seconds=1),
+            "last_error": None, "sent_at": None
+        }
+        return oid
+
+    def connection(self):
+        return _Conn(self)
+
+
+class _Conn:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, **kwargs):
+        return _Cursor(self.db)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Cursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, query, params):
+        if query == email_outbox.ENQUEUE_QUERY:
+            log_id, to_email, subject, body, due = params
+            self.db.add(to_email=to_email, body=body, due=due)
+            self.db.rows[self.db.next_id - 1]["subject"] = subject
+        elif query == email_outbox.CLAIM_QUERY:
+            now, limit = params
+            due = [
+                r for r in self.db.rows.values()
+                if r["status"] in ("PENDING", "SENDING") and r["next_attempt_at"] <= now
+            ]
+            self.result = [dict(r) for r in sorted(due, key=lambda r: r["outbox_id"])[:limit]]
+        else:
+            raise AssertionError(f"unexpected query: {query}")
+
+    def executemany(self, query, seq):
+        for params in seq:
+            if query == email_outbox.LEASE_QUERY:
+                attempts, until, oid = params
+                self.db.rows[oid].update(status="SENDING", attempts=attempts, next_attempt_at=until)
+            elif query == email_outbox.SENT_QUERY:
+                sent_at, oid = params
+                self.db.rows[oid].update(status="SENT", sent_at=sent_at, last_error=None)
+            elif query == email_outbox.RETRY_QUERY:
+                status, attempts, due, error, oid = params
+                self.db.rows[oid].update(
+                    status=status, attempts=attempts, next_attempt_at=due, last_error=error
+                )
+            elif query == email_outbox.RELEASE_QUERY:
+                due, oid = params
+                self.db.rows[oid].update(status="PENDING", next_attempt_at=due)
+            else:
+                raise AssertionError(f"unexpected query: {query}")
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeSMTP:
+    """Stands in for the smtplib session; fails for addresses in `reject`."""
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.sent = []
+        self.sessions = 0
+
+    def open(self):
+        self.sessions += 1
+        return self
+
+    def send_message(self, msg):
+        if msg["To"] in self.reject:
+            raise OSError("550 mailbox unavailable")
+        self.sent.append(msg)
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeOutboxDB()
+    monkeypatch.setattr(email_outbox, "get_db_connection", fake.connection)
+    return fake
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    fake = FakeSMTP()
+    monkeypatch.setattr(email_outbox, "open_smtp_session", fake.open)
+    return fake
+
+
+def test_lease_outlasts_a_batch_of_slow_sends():
+    assert email_outbox.LEASE_SECONDS > email_outbox.BATCH_SIZE * email_outbox.SMTP_TIMEOUT
+
+
+def test_enqueued_alert_is_sent_once_with_a_readable_body(db, smtp):
+    email_outbox.enqueue_skip_email(
+        db.connection().cursor(), 1, "t@x.com", "Śruti Deshpande",
+        "Ãsha Patil", "DBMS", "10:05"
+    )
+    assert email_outbox.run_once() == 1
+    assert email_outbox.run_once() == 0
+
+    (msg,) = smtp.sent
+    parsed = email.message_from_string(msg.as_string())
+    body = parsed.get_payload(decode=True).decode(parsed.get_content_charset())
+    assert "Dear Śruti Deshpande" in body
+    assert "Ãsha Patil" in body
+    assert db.rows[1]["status"] == "SENT"
+
+
+def test_failed_send_backs_off_then_fails_for_good(db, smtp, monkeypatch):
+    monkeypatch.setattr(email_outbox, "MAX_ATTEMPTS", 3)
+    smtp.reject.add("bad@x.com")
+    oid = db.add(to_email="bad@x.com")
+
+    for attempt in (1, 2):
+        assert email_outbox.run_once() == 1
+        row = db.rows[oid]
+        assert (row["status"], row["attempts"]) == ("PENDING", attempt)
+        assert row["next_attempt_at"] > datetime.now()
+        assert email_outbox.run_once() == 0        # not due yet
+        row["next_attempt_at"] = datetime.now() - timedelta(seconds=1)
+
+    assert email_outbox.run_once() == 1
+    assert db.rows[oid]["status"] == "FAILED"
+    assert db.rows[oid]["attempts"] == 3
+    assert "550" in db.rows[oid]["last_error"]
+
+
+def test_live_lease_is_not_reclaimed(db, smtp):
+    db.add(status="SENDING", due=datetime.now() + timedelta(seconds=60))
+    assert email_outbox.run_once() == 0
+    assert smtp.sent == []
+
+
+def test_expired_lease_is_reclaimed_as_an_attempt(db, smtp):
+    oid = db.add(status="SENDING", attempts=1)
+    assert email_outbox.run_once() == 1
+    assert db.rows[oid]["status"] == "SENT"
+    assert len(smtp.sent) == 1
+
+
+def test_worker_dying_every_time_ends_in_failed(db, smtp, monkeypatch):
+    monkeypatch.setattr(email_outbox, "MAX_ATTEMPTS", 3)
+    oid = db.add()
+
+    claims = 0
+    while email_outbox._claim_batch()[0]:        # claimed, then the worker "dies"
+        claims += 1
+        db.rows[oid]["next_attempt_at"] = datetime.now() - timedelta(seconds=1)
+
+    # first claim + two re-claims; the third expiry marks it FAILED
+    assert claims == 3
+    assert db.rows[oid]["status"] == "FAILED"
+    assert db.rows[oid]["last_error"] == "Lease expired"
+    assert smtp.sent == []
+
+
+def test_sender_stops_before_the_lease_runs_out(db, smtp):
+    first, second = db.add(), db.add()
+    rows, _ = email_outbox._claim_batch()
+
+    # only enough lease left for nothing: both are released untouched
+    almost_over = datetime.now() + timedelta(seconds=email_outbox.MESSAGE_WORST_SECONDS - 1)
+    email_outbox._finish(email_outbox._send_batch(rows, almost_over))
+
+    assert smtp.sent == []
+    for oid in (first, second):
+        assert db.rows[oid]["status"] == "PENDING"
+        assert db.rows[oid]["attempts"] == 0
+
+
+def test_smtp_session_failure_counts_for_every_row(db, monkeypatch):
+    def refuse():
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(email_outbox, "open_smtp_session", refuse)
+    first, second = db.add(), db.add()
+    assert email_outbox.run_once() == 2
+    assert [db.rows[o]["attempts"] for o in (first, second)] == [1, 1]
+    assert all(db.rows[o]["status"] == "PENDING" for o in (first, second))
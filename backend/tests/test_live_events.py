@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import live_events
+
+
+@pytest.fixture(autouse=True)
+def no_subscribers():
+    yield
+    with live_events._lock:
+        live_events._subscribers.clear()
+
+
+def _parse(message):
+    event, data = message.strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_publish_from_a_worker_thread_reaches_the_subscriber():
+    async def main():
+        sub = live_events.subscribe()
+        worker = threading.Thread(target=live_events.publish, args=("scan", {"n": 1}))
+        worker.start()
+        message = await asyncio.wait_for(sub[1].get(), 2)
+        worker.join()
+        live_events.unsubscribe(sub)
+        return message
+
+    assert _parse(asyncio.run(main())) == ("scan", {"n": 1})
+    assert live_events.subscriber_count() == 0
+
+
+def test_slow_client_drops_events_instead_of_blocking(monkeypatch):
+    monkeypatch.setattr(live_events, "QUEUE_SIZE", 2)
+
+    async def main():
+        sub = live_events.subscribe()
+        for n in range(5):
+            live_events.publish("scan", {"n": n})
+        await asyncio.sleep(0)          # let the loop run the offers
+        return [_parse(sub[1].get_nowait())[1]["n"] for _ in range(sub[1].qsize())]
+
+    assert asyncio.run(main()) == [0, 1]
+
+
+def test_subscriber_on_a_closed_loop_is_dropped():
+    async def main():
+        return live_events.subscribe()
+
+    asyncio.run(main())                 # the loop closes with the subscriber still registered
+    live_events.publish("scan", {})
+    assert live_events.subscriber_count() == 0
+
+
+def test_publish_log_carries_deltas_and_occupancy(monkeypatch):
+    monkeypatch.setattr(live_events.occupancy, "snapshot", lambda: {"inside_now": 7})
+
+    async def main():
+        sub = live_events.subscribe()
+        live_events.publish_log(
+            1, "S1", "Asha", "student", "CS", "ENTRY", "SKIP", "DBMS",
+            datetime(2026, 1, 5, 10, 5)
+        )
+        await asyncio.sleep(0)
+        return sub[1].get_nowait()
+
+    event, data = _parse(asyncio.run(main()))
+    assert event == "scan"
+    assert data["delta"] == {"entries": 1, "exits": 0, "skips": 1, "logs": 1}
+    assert data["log"]["scan_time"] == "2026-01-05 10:05:00"
+    assert data["occupancy"] == {"inside_now": 7}
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+pytest.importorskip("passlib")
+
+import member_directory
+import member_search
+
+
+class FakeDB:
+    """students/teachers tables for member_directory's reload query."""
+
+    def __init__(self, students, teachers=()):
+        self.students = students
+        self.teachers = list(teachers)
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def connection(self):
+        db = self
+
+        class Cursor:
+            def execute(self, query, params=None):
+                self.query = query
+
+            def fetchall(self):
+                if "FROM students" in self.query:
+                    db.gate.wait(2)
+                    return list(db.students)
+                return list(db.teachers)
+
+            def fetchone(self):
+                return None         # lookup fallback: not in the DB
+
+        class Conn:
+            def cursor(self, **kwargs):
+                return Cursor()
+
+            def close(self):
+                pass
+
+        return Conn()
+
+
+def student(member_id, name):
+    return {"member_id": member_id, "name": name, "department": "CS",
+            "year": "SY", "division": "A", "batch": "B1", "email": None}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB([student("S1", "Asha")])
+    monkeypatch.setattr(member_directory, "get_db_connection", fake.connection)
+    assert member_directory.load()
+    yield fake
+    member_search.rebuild([])
+
+
+def wait_for_reload(timeout=2):
+    deadline = time.monotonic() + timeout
+    while member_directory._directory._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_reload_picks_up_deactivation_from_another_worker(db):
+    assert member_directory.get("s1").name == "Asha"
+
+    db.students = []                # deactivated elsewhere
+    db.gate.clear()
+    member_directory.invalidate()
+    assert member_directory.lookup("S1").name == "Asha"     # stale copy, no wait
+    db.gate.set()
+    wait_for_reload()
+
+    assert member_directory.get("S1") is None
+    assert member_search.search("asha") == []
+
+
+def test_put_during_reload_survives_the_swap(db):
+    db.gate.clear()
+    member_directory.invalidate()
+    member_directory.lookup("S1")   # starts the reload, which blocks on the gate
+    time.sleep(0.05)
+
+    member_directory.put("student", "S2", "Ravi", "CS", year="SY", division="A", batch="B1")
+    member_directory.remove("S1", "student")
+    db.gate.set()
+    wait_for_reload()
+
+    assert member_directory.get("S2").name == "Ravi"
+    assert member_directory.get("S1") is None
+
+
+def test_teacher_shadows_student_with_same_id(db):
+    member_directory.put("teacher", "S1", "Dr. Asha", "CS")
+    member_directory.put("student", "S1", "Asha", "CS", year="SY", division="A", batch="B1")
+    assert member_directory.get("S1").role == "teacher"
+
+
+def test_removing_a_teacher_restores_the_shadowed_student(db):
+    member_directory.put("teacher", "S1", "Dr. Asha", "CS")
+    assert member_directory.get("S1").role == "teacher"
+
+    member_directory.remove("S1", "teacher")
+    assert member_directory.get("S1").name == "Asha"
+    assert member_directory.get("S1").role == "student"
+    assert [r.member_id for r in member_search.search("asha")] == ["S1"]
+
+
+def test_removing_a_shadowed_student_keeps_the_teacher(db):
+    member_directory.put("teacher", "S1", "Dr. Asha", "CS")
+    member_directory.remove("S1", "student")
+    member_directory.remove("S1", "teacher")
+    assert member_directory.get("S1") is None
+
+
+def test_reload_keeps_the_student_behind_a_teacher(db):
+    db.teachers = [{"member_id": "S1", "name": "Dr. Asha", "department": "CS", "email": None}]
+    assert member_directory.load()
+    assert member_directory.get("S1").role == "teacher"
+
+    member_directory.remove("S1", "teacher")
+    assert member_directory.get("S1").name == "Asha"
@@ -0,0 +1,87 @@
+import pytest
+
+pytest.importorskip("passlib")
+
+import member_import
+
+
+class FakeCursor:
+    """Knows a set of existing student ids; records what gets written."""
+
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.written = []
+        self._result = []
+
+    def execute(self, query, params=None):
+        self._result = []
+        if query.lstrip().startswith("SELECT") and params:
+            self._result = [(i,) for i in params if i in self.existing]
+
+    def executemany(self, query, seq):
+        self.written.extend(seq)
+
+    def fetchall(self):
+        return self._result
+
+
+def student(member_id, **extra):
+    row = {
+        "student_id": member_id, "name": "N", "department": "cs", "year": "sy",
+        "division": "a", "batch": "b1", "email": "X@Y.COM", "contact_no": "9999999999"
+    }
+    row.update(extra)
+    return row
+
+
+def test_import_reports_each_chunk_and_returns_only_counts(monkeypatch):
+    monkeypatch.setattr(member_import, "BATCH_SIZE", 2)
+    monkeypatch.setattr(member_import, "DIFF_SAMPLE", 2)
+    chunks = []
+
+    rows = [student("s1"), student("S2"), student("S3"), student("S1"), student("S4")]
+    result = member_import.import_members(
+        FakeCursor(existing={"S3"}), "student", rows,
+        on_chunk=lambda upserted, deactivated: chunks.append([r["student_id"] for r in upserted])
+    )
+
+    assert chunks == [["S1", "S2"], ["S4"]]
+    assert result["added"] == 3
+    assert result["sample"] == {"added": ["S1", "S2"]}
+    assert [(e["row"], e["reason"]) for e in result["errors"]] == [
+        (4, "Already exists"), (5, "Duplicate ID in file")
+    ]
+    assert result["skipped"] == 2
+
+
+def test_rows_are_normalized_before_writing():
+    cur = FakeCursor()
+    member_import.import_members(cur, "student", [student(" s9 ")])
+    assert cur.written == [("S9", "N", "CS", "SY", "A", "B1", "x@y.com", "9999999999")]
+
+
+def test_missing_column_is_a_row_error():
+    row = student("S1")
+    del row["email"]
+    result = member_import.import_members(FakeCursor(), "student", [row])
+    assert result["added"] == 0
+    assert result["errors"] == [{"row": 2, "id": "S1", "reason": "Missing column: email"}]
+
+
+def test_reupload_after_a_partial_commit_writes_only_the_rest(monkeypatch):
+    monkeypatch.setattr(member_import, "BATCH_SIZE", 2)
+    rows = [student("S1"), student("S2"), student("S3")]
+    cur = FakeCursor()
+
+    def fail_after_first_chunk(upserted, deactivated):
+        cur.existing.update(r["student_id"] for r in upserted)     # committed
+        raise RuntimeError("Lost connection")
+
+    with pytest.raises(RuntimeError):
+        member_import.import_members(cur, "student", rows, on_chunk=fail_after_first_chunk)
+
+    cur.written = []
+    result = member_import.import_members(cur, "student", rows)
+    assert [values[0] for values in cur.written] == ["S3"]
+    assert result["added"] == 1
+    assert [e["reason"] for e in result["errors"]] == ["Already exists", "Already exists"]
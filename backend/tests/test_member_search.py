@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+import member_search
+from member_search import PrefixTrie, trigrams
+
+
+def rec(member_id, name, role="student"):
+    return SimpleNamespace(member_id=member_id, name=name, role=role)
+
+
+@pytest.fixture(autouse=True)
+def index():
+    member_search.rebuild([
+        rec("S101", "Asha Patil"),
+        rec("S102", "Ravi Kulkarni"),
+        rec("S110", "Sneha Rao"),
+        rec("T7", "Anil Rao", role="teacher"),
+    ])
+    yield
+    member_search.rebuild([])
+
+
+def ids(results):
+    return [r.member_id for r in results]
+
+
+def test_trie_walks_keys_in_order():
+    trie = PrefixTrie()
+    for key in ["S2", "S10", "S1", "T1"]:
+        trie.add(key, key)
+    assert list(trie.iter_sorted("S")) == ["S1", "S10", "S2"]
+    trie.discard("S10", "S10")
+    assert list(trie.iter_sorted("S1")) == ["S1"]
+    assert list(trie.iter_sorted("X")) == []
+
+
+def test_short_words_get_padded_trigrams():
+    assert "  a" in trigrams("Asha")
+    assert " as" in trigrams("Asha")
+
+
+def test_id_prefix_matches_in_id_order():
+    assert ids(member_search.search("s1")) == ["S101", "S102", "S110"]
+    assert ids(member_search.search("S10", limit=1)) == ["S101"]
+
+
+def test_name_matches_rank_word_starts_first():
+    member_search.add(rec("S201", "Kiran Joshi"))
+    member_search.add(rec("S202", "Ranjit Shah"))
+    assert ids(member_search.search("ran")) == ["S202", "S201"]
+    # ties between word starts go by name
+    assert ids(member_search.search("rao")) == ["T7", "S110"]
+
+
+def test_one_or_two_letters_match_word_starts_only():
+    assert ids(member_search.search("ra", role="student")) == ["S102", "S110"]
+    assert member_search.search("av") == []
+
+
+def test_multi_word_query_needs_every_word():
+    assert ids(member_search.search("sneha rao")) == ["S110"]
+    assert member_search.search("sneha patil") == []
+
+
+def test_role_filter_and_empty_query():
+    assert ids(member_search.search("rao", role="student")) == ["S110"]
+    assert member_search.search("   ") == []
+
+
+def test_add_replaces_and_remove_forgets():
+    member_search.add(rec("S102", "Ravi Deshmukh"))
+    assert member_search.search("kulkarni") == []
+    assert ids(member_search.search("deshmukh")) == ["S102"]
+
+    member_search.remove("S102")
+    assert member_search.search("ravi") == []
+    assert member_search.search("S102") == []
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("mysql.connector")
+
+import metadata_cache
+from background_refresh import BackgroundRefresh
+
+
+@pytest.fixture
+def facets(monkeypatch):
+    """Swaps in a fresh facet cache whose loader the test controls."""
+    state = {
+        "students": {("CS", "SY", "A", "B1"), ("CS", "SY", "B", "B2"), ("IT", "TY", "A", "B1")},
+        "teachers": {"CS", "MECH"},
+        "timetable": {("CS", "SY", "A", None)},
+        "on_load": None,
+        "loads": 0
+    }
+
+    def load():
+        state["loads"] += 1
+        snapshot = {k: set(state[k]) for k in ("students", "teachers", "timetable")}
+        if state["on_load"]:
+            state["on_load"]()
+        return snapshot
+
+    monkeypatch.setattr(
+        metadata_cache, "_facets", BackgroundRefresh("test-facets", load, metadata_cache.TTL_SECONDS)
+    )
+    return state
+
+
+def test_projections_filter_case_insensitively(facets):
+    assert metadata_cache.student_values("division", department="cs", year="sy") == ["A", "B"]
+    assert metadata_cache.all_departments() == ["CS", "IT", "MECH"]
+    assert metadata_cache.timetable_values("batch", department="CS") == [None]
+
+
+def test_invalidate_shows_the_write_on_the_next_read(facets):
+    assert metadata_cache.teacher_departments() == ["CS", "MECH"]
+    facets["teachers"].add("CIVIL")
+    assert metadata_cache.teacher_departments() == ["CS", "MECH"]     # cached
+    metadata_cache.invalidate()
+    assert metadata_cache.teacher_departments() == ["CIVIL", "CS", "MECH"]
+
+
+def test_invalidate_during_load_is_not_lost(facets):
+    def write_lands_mid_load():
+        facets["on_load"] = None
+        facets["teachers"].add("CIVIL")
+        metadata_cache.invalidate()
+
+    facets["on_load"] = write_lands_mid_load
+    assert "CIVIL" not in metadata_cache.teacher_departments()   # read before the write
+    assert "CIVIL" in metadata_cache.teacher_departments()       # so it reloads again
+    assert facets["loads"] == 2
+
+
+def test_render_etag_tracks_the_body():
+    body, etag = metadata_cache.render({"a": [1, 2]})
+    assert body == '{"a":[1,2]}'
+    assert metadata_cache.render({"a": [1, 2]})[1] == etag
+    assert metadata_cache.render({"a": [2, 1]})[1] != etag
@@ -0,0 +1,108 @@
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import occupancy
+
+
+class FakePresence:
+    """member_presence rows for RECONCILE_QUERY; on_read runs mid-query."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.on_read = None
+        self.fail = None
+
+    def connection(self):
+        db = self
+
+        class Cursor:
+            def execute(self, query, params=None):
+                if db.fail:
+                    raise db.fail
+
+            def fetchall(self):
+                if db.on_read:
+                    db.on_read()
+                return [dict(r) for r in db.rows]
+
+        class Conn:
+            def cursor(self, **kwargs):
+                return Cursor()
+
+            def close(self):
+                pass
+
+        return Conn()
+
+
+def inside(user_id, department="CS", role="student"):
+    return {"user_id": user_id, "department": department, "role": role}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakePresence([inside("S1"), inside("T1", "IT", "teacher")])
+    monkeypatch.setattr(occupancy, "get_db_connection", fake.connection)
+    monkeypatch.setattr(occupancy, "day_range", lambda: (datetime.now().replace(hour=0), None))
+    yield fake
+    occupancy.stop()
+    with occupancy._lock:
+        occupancy._inside.clear()
+        occupancy._by_group.clear()
+        occupancy._journal = None
+
+
+def test_reconcile_rebuilds_the_counters(db):
+    occupancy.record("GHOST", "ENTRY", "CS", "student")     # missed EXIT
+    assert occupancy.reconcile()
+
+    snap = occupancy.snapshot()
+    assert snap["inside_now"] == 2
+    assert snap["by_role"] == {"student": 1, "teacher": 1}
+    assert snap["by_department"] == [
+        {"department": "CS", "count": 1}, {"department": "IT", "count": 1}
+    ]
+
+
+def test_scans_during_reconcile_are_replayed(db):
+    def scans_commit_mid_read():
+        occupancy.record("S2", "ENTRY", "CS", "student")
+        occupancy.record("S1", "EXIT", "CS", "student")
+
+    db.on_read = scans_commit_mid_read      # the read predates both scans
+    assert occupancy.reconcile()
+
+    assert set(occupancy._inside) == {"S2", "T1"}
+    assert occupancy.snapshot()["by_role"] == {"student": 1, "teacher": 1}
+    assert occupancy._journal is None
+
+
+def test_entry_is_counted_once(db):
+    occupancy.reconcile()
+    occupancy.record("S1", "ENTRY", "CS", "student")
+    assert occupancy.snapshot()["inside_now"] == 2
+
+
+def test_failed_reconcile_keeps_the_counters(db):
+    occupancy.reconcile()
+    db.fail = RuntimeError("MySQL server has gone away")
+    with pytest.raises(RuntimeError):
+        occupancy.reconcile()
+    assert occupancy.snapshot()["inside_now"] == 2
+    assert occupancy._journal is None
+
+
+def test_start_survives_a_database_error(db, monkeypatch):
+    monkeypatch.setattr(occupancy, "RECONCILE_SECONDS", 0.01)
+    db.fail = RuntimeError("Can't connect to MySQL server")
+    occupancy.start()                       # must not raise
+
+    db.fail = None
+    deadline = time.monotonic() + 2         # the background loop recovers
+    while occupancy.snapshot()["inside_now"] != 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert occupancy.snapshot()["inside_now"] == 2
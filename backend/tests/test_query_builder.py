@@ -0,0 +1,48 @@
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException
+
+from query_builder import add_date_filters, day_range, hour_range, log_filters, parse_date, where
+
+
+def test_day_range_is_half_open():
+    assert day_range("2026-03-01") == (datetime(2026, 3, 1), datetime(2026, 3, 2))
+    assert day_range(date(2026, 12, 31))[1] == datetime(2027, 1, 1)
+
+
+def test_hour_range_includes_the_end_hour():
+    assert hour_range("2026-03-01", 9, 17) == (datetime(2026, 3, 1, 9), datetime(2026, 3, 1, 18))
+
+
+def test_bad_date_is_a_400():
+    with pytest.raises(HTTPException) as exc:
+        parse_date("01/03/2026")
+    assert exc.value.status_code == 400
+
+
+def test_date_filters_cover_whole_days():
+    conditions, params = [], []
+    add_date_filters(conditions, params, "logs.scan_time", "2026-03-01", "2026-03-03")
+    assert conditions == ["logs.scan_time >= %s", "logs.scan_time < %s"]
+    assert params == [datetime(2026, 3, 1), datetime(2026, 3, 4)]
+
+
+def test_where():
+    assert where([]) == ""
+    assert where(["a = %s", "b = %s"]) == "WHERE a = %s AND b = %s"
+
+
+def test_log_filters_keep_params_in_placeholder_order():
+    conditions, params = log_filters(
+        user_id="S1", department="CS", status="SKIP",
+        date_from="2026-03-01", role="student", year="SY"
+    )
+    sql = where(conditions)
+    assert sql.count("%s") == len(params)
+    assert params == ["%S1%", "CS", "CS", "SKIP", datetime(2026, 3, 1), "SY"]
+    assert "students.student_id IS NOT NULL" in conditions
+    assert not any("DATE(" in c for c in conditions)
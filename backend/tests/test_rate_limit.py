@@ -0,0 +1,65 @@
+import pytest
+
+import rate_limit
+from rate_limit import TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", c)
+    return c
+
+
+def test_burst_up_to_capacity_then_wait(clock):
+    limiter = TokenBucketLimiter(capacity=3, rate=1 / 10)
+    assert [limiter.take("k") for _ in range(3)] == [0, 0, 0]
+    assert limiter.take("k") == pytest.approx(10)
+
+
+def test_tokens_refill_over_time(clock):
+    limiter = TokenBucketLimiter(capacity=2, rate=1 / 10)
+    limiter.take("k")
+    limiter.take("k")
+    clock.now += 4
+    assert limiter.take("k") == pytest.approx(6)
+    clock.now += 6
+    assert limiter.take("k") == 0
+
+
+def test_keys_are_independent_and_reset(clock):
+    limiter = TokenBucketLimiter(capacity=1, rate=1)
+    assert limiter.take("a") == 0
+    assert limiter.take("a") > 0
+    assert limiter.take("b") == 0
+    limiter.reset("a")
+    assert limiter.take("a") == 0
+
+
+def test_least_recently_used_keys_are_dropped(clock):
+    limiter = TokenBucketLimiter(capacity=1, rate=0.001, max_keys=2)
+    limiter.take("a")
+    limiter.take("b")
+    limiter.take("c")           # evicts "a"
+    assert len(limiter._buckets) == 2
+    assert limiter.take("a") == 0
+
+
+def test_login_limit_is_per_username_and_cleared_on_success(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "login_by_user", TokenBucketLimiter(capacity=2, rate=1 / 12))
+    monkeypatch.setattr(rate_limit, "login_by_ip", TokenBucketLimiter(capacity=20, rate=1 / 3))
+
+    assert rate_limit.check_login("Admin", "10.0.0.1") == 0
+    assert rate_limit.check_login(" admin ", "10.0.0.2") == 0
+    assert rate_limit.check_login("ADMIN", "10.0.0.3") == pytest.approx(12)
+
+    rate_limit.login_succeeded("admin")
+    assert rate_limit.check_login("admin", "10.0.0.4") == 0
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException
+
+import session_tokens
+
+
+def request(headers=None, query=None):
+    return SimpleNamespace(headers=headers or {}, query_params=query or {})
+
+
+def test_issued_token_verifies():
+    claims = session_tokens.verify(session_tokens.issue("admin", "superadmin"))
+    assert claims["sub"] == "admin"
+    assert claims["role"] == "superadmin"
+
+
+def test_tampered_or_garbage_tokens_are_rejected():
+    token = session_tokens.issue("admin", "admin")
+    payload, signature = token.split(".")
+    forged = session_tokens._b64(b'{"sub": "admin", "role": "admin", "exp": 9999999999}')
+
+    assert session_tokens.verify(f"{forged}.{signature}") is None
+    assert session_tokens.verify(f"{payload}.{signature[:-2]}xx") is None
+    assert session_tokens.verify("not-a-token") is None
+    assert session_tokens.verify("") is None
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    monkeypatch.setattr(session_tokens, "TOKEN_TTL_SECONDS", -1)
+    assert session_tokens.verify(session_tokens.issue("admin", "admin")) is None
+
+
+def test_require_admin_reads_bearer_header_or_query_token():
+    token = session_tokens.issue("admin", "admin")
+    assert session_tokens.require_admin(request(headers={"authorization": f"Bearer {token}"}))["sub"] == "admin"
+    assert session_tokens.require_admin(request(query={"token": token}))["sub"] == "admin"
+
+
+def test_require_admin_rejects_missing_token():
+    with pytest.raises(HTTPException) as exc:
+        session_tokens.require_admin(request())
+    assert exc.value.status_code == 401
@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip("mysql.connector")
+pytest.importorskip("passlib")
+
+from timetable_clash import CLASS_CLASH, TEACHER_CLASH, ClashChecker
+
+
+def slot(start, end, batch=None, teacher="T1", division="A", day="Monday", timetable_id=None):
+    return {
+        "timetable_id": timetable_id,
+        "department": "CS", "year": "SY", "division": division,
+        "batch": batch, "teacher_id": teacher, "day_of_week": day,
+        "start_time": start, "end_time": end
+    }
+
+
+@pytest.fixture
+def checker():
+    c = ClashChecker()
+    c.add(slot("09:00", "10:00", timetable_id=1))
+    return c
+
+
+def test_overlapping_lecture_clashes(checker):
+    assert checker.conflict(slot("09:30", "10:30", teacher="T2")) == CLASS_CLASH
+
+
+def test_back_to_back_slots_do_not_clash(checker):
+    assert checker.conflict(slot("10:00", "11:00")) is None
+    assert checker.conflict(slot("08:00", "09:00")) is None
+
+
+def test_other_day_or_division_is_independent(checker):
+    assert checker.conflict(slot("09:00", "10:00", teacher="T2", day="Tuesday")) is None
+    assert checker.conflict(slot("09:00", "10:00", teacher="T2", division="B")) is None
+
+
+def test_teacher_cannot_be_in_two_classes(checker):
+    assert checker.conflict(slot("09:15", "09:45", division="B")) == TEACHER_CLASH
+
+
+def test_practicals_clash_only_within_a_batch():
+    c = ClashChecker()
+    c.add(slot("11:00", "13:00", batch="B1", teacher="T1"))
+    assert c.conflict(slot("11:00", "13:00", batch="B2", teacher="T2")) is None
+    assert c.conflict(slot("12:00", "13:00", batch="b1", teacher="T2")) == CLASS_CLASH
+    # a lecture blocks every batch
+    assert c.conflict(slot("12:00", "13:00", teacher="T3")) == CLASS_CLASH
+
+
+def test_update_ignores_its_own_row(checker):
+    assert checker.conflict(slot("09:00", "10:30", timetable_id=1), ignore_id=1) is None
+    assert checker.conflict(slot("09:00", "10:30", timetable_id=2), ignore_id=2) == CLASS_CLASH
+
+
+def test_keys_are_normalized(checker):
+    moved = slot("09:30", "10:30", teacher="t1", day="monday")
+    moved["department"] = " cs "
+    assert checker.conflict(moved) == CLASS_CLASH
+
+
+class FakeCursor:
+    description = [("timetable_id",), ("department",), ("year",), ("division",), ("batch",),
+                   ("teacher_id",), ("day_of_week",), ("start_time",), ("end_time",)]
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_load_all_reads_tuple_rows():
+    cur = FakeCursor([(7, "CS", "SY", "A", None, "T9", "Monday", "14:00", "15:00")])
+    c = ClashChecker.load_all(cur)
+    assert c.conflict(slot("14:30", "15:30", teacher="T2")) == CLASS_CLASH
+    assert c.conflict(slot("14:30", "15:30", teacher="T2"), ignore_id=7) is None
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+pytest.importorskip("passlib")
+
+from timetable_index import IntervalList, to_seconds
+
+
+def test_to_seconds_accepts_timedelta_and_strings():
+    assert to_seconds(timedelta(hours=9, minutes=30)) == 34200
+    assert to_seconds("09:30") == 34200
+    assert to_seconds("09:30:15") == 34215
+    assert to_seconds(42) == 42
+
+
+def test_find_is_inclusive_at_both_ends():
+    lectures = IntervalList([(100, 200, "a")])
+    assert lectures.find(100) == "a"
+    assert lectures.find(200) == "a"
+    assert lectures.find(99) is None
+    assert lectures.find(201) is None
+
+
+def test_find_returns_none_when_empty():
+    assert IntervalList([]).find(500) is None
+
+
+def test_find_sees_long_interval_behind_shorter_ones():
+    # 'long' starts first and outlasts 'short'; the backwards scan must
+    # step past 'short' to find it
+    lectures = IntervalList([(300, 350, "short"), (0, 1000, "long")])
+    assert lectures.find(320) == "short"
+    assert lectures.find(400) == "long"
+
+
+def test_find_with_back_to_back_slots():
+    lectures = IntervalList([(0, 100, "first"), (100, 200, "second"), (250, 300, "third")])
+    assert lectures.find(50) == "first"
+    assert lectures.find(150) == "second"
+    assert lectures.find(225) is None
+    assert lectures.find(275) == "third"
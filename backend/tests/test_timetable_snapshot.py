@@ -0,0 +1,104 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("mysql.connector")
+
+import timetable_snapshot
+from background_refresh import BackgroundRefresh
+
+
+def _row(tid, department, year, division, batch, teacher, day, start_h):
+    return {
+        "timetable_id": tid, "department": department, "year": year,
+        "division": division, "batch": batch, "teacher_id": teacher,
+        "day_of_week": day, "subject": f"S{tid}",
+        "start_time": timedelta(hours=start_h), "end_time": timedelta(hours=start_h + 1)
+    }
+
+
+class _Cursor:
+    def __init__(self, table):
+        self.table = table
+
+    def execute(self, query, params=None):
+        self.rows = [dict(r) for r in self.table["rows"]]
+        if self.table["on_load"]:
+            self.table["on_load"]()
+
+    def fetchall(self):
+        return self.rows
+
+
+class _Conn:
+    def __init__(self, table):
+        self.table = table
+
+    def cursor(self, **kwargs):
+        self.table["loads"] += 1
+        return _Cursor(self.table)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def table(monkeypatch):
+    state = {
+        "rows": [
+            _row(1, "CS", "SY", "A", None, "T1", "Monday", 9),
+            _row(2, "CS", "SY", "A", "B1", "T2", "Monday", 14),
+            _row(3, "CS", "SY", "A", "B2", "T2", "Tuesday", 14),
+            _row(4, "IT", "TY", "B", None, "T1", "Tuesday", 10)
+        ],
+        "on_load": None,
+        "loads": 0
+    }
+    monkeypatch.setattr(timetable_snapshot, "get_db_connection", lambda: _Conn(state))
+    monkeypatch.setattr(
+        timetable_snapshot, "_snapshot",
+        BackgroundRefresh("test-snapshot", timetable_snapshot._load, timetable_snapshot.TTL_SECONDS)
+    )
+    return state
+
+
+def _ids(role=None, **filters):
+    body, _ = timetable_snapshot.view(role=role, **filters)
+    return [r["timetable_id"] for r in json.loads(body)]
+
+
+def test_student_view_keeps_lectures_and_own_batch(table):
+    assert _ids("student", department="cs", year="sy", division="a", batch="b1") == [1, 2]
+    assert _ids("student", department="CS", year="SY", division="A", day_of_week="tuesday") == [3]
+
+
+def test_teacher_view_and_time_format(table):
+    body, _ = timetable_snapshot.view(role="teacher", teacher_id="t2")
+    rows = json.loads(body)
+    assert [r["timetable_id"] for r in rows] == [2, 3]
+    assert (rows[0]["start_time"], rows[0]["end_time"]) == ("02:00 PM", "03:00 PM")
+
+
+def test_views_are_rendered_once_per_snapshot(table):
+    first = timetable_snapshot.view(role="teacher", teacher_id="T1")
+    assert timetable_snapshot.view(role="teacher", teacher_id="t1") is first
+    assert table["loads"] == 1
+
+
+def test_invalidate_during_load_is_not_lost(table):
+    def edit_lands_mid_load():
+        table["on_load"] = None
+        table["rows"].append(_row(5, "CS", "SY", "A", None, "T3", "Friday", 11))
+        timetable_snapshot.invalidate()
+
+    table["on_load"] = edit_lands_mid_load
+    assert 5 not in _ids()          # read before the edit
+    assert 5 in _ids()              # so the next request reloads
+    assert table["loads"] == 2
+
+
+def test_database_down_serves_an_empty_timetable(table, monkeypatch):
+    monkeypatch.setattr(timetable_snapshot, "get_db_connection", lambda: None)
+    assert _ids() == []
@@ -0,0 +1,124 @@
+from bisect import bisect_left, insort
+from timetable_index import to_seconds
+from utils import normalize_text
+
+
+# ======================================================
+# CLASH CHECKER
+# ======================================================
+# Slots are grouped per (class, day) and per (teacher, day), each kept
+# as a start-sorted list. A new slot [start, end) only has to look at
+# the slots in its own groups that start before it ends.
+#   class clash:   overlap, and either side is a lecture or same batch
+#   teacher clash: overlap
+
+CLASS_CLASH = "Class timetable clash detected"
+TEACHER_CLASH = "Teacher already assigned in this slot"
+
+SLOT_COLUMNS = """
+    timetable_id, department, year, division, batch,
+    teacher_id, day_of_week, start_time, end_time
+"""
+
+
+class IntervalSet:
+    __slots__ = ("items",)
+
+    def __init__(self):
+        self.items = []     # [(start, end, batch, timetable_id)]
+
+    def add(self, start, end, batch, timetable_id):
+        insort(self.items, (start, end, batch or "", timetable_id))
+
+    def overlapping(self, start, end):
+        # every candidate starts before `end`
+        stop = bisect_left(self.items, (end,))
+        for item in self.items[:stop]:
+            if item[1] > start:
+                yield item
+
+
+class ClashChecker:
+    def __init__(self):
+        self.classes = {}    # (department, year, division, day) -> IntervalSet
+        self.teachers = {}   # (teacher_id, day) -> IntervalSet
+
+    @staticmethod
+    def _class_key(slot):
+        return (
+            normalize_text(slot["department"], "upper"),
+            normalize_text(slot["year"], "upper"),
+            normalize_text(slot["division"], "upper"),
+            normalize_text(slot["day_of_week"], "title")
+        )
+
+    @staticmethod
+    def _teacher_key(slot):
+        return (
+            normalize_text(slot["teacher_id"], "upper"),
+            normalize_text(slot["day_of_week"], "title")
+        )
+
+    def add(self, slot):
+        start, end = to_seconds(slot["start_time"]), to_seconds(slot["end_time"])
+        batch = normalize_text(slot.get("batch"), "upper")
+        tid = slot.get("timetable_id")
+        self.classes.setdefault(self._class_key(slot), IntervalSet()).add(start, end, batch, tid)
+        self.teachers.setdefault(self._teacher_key(slot), IntervalSet()).add(start, end, batch, tid)
+
+    def conflict(self, slot, ignore_id=None):
+        """Reason string if `slot` clashes with anything held, else None."""
+        start, end = to_seconds(slot["start_time"]), to_seconds(slot["end_time"])
+        batch = normalize_text(slot.get("batch"), "upper") or ""
+
+        group = self.classes.get(self._class_key(slot))
+        if group is not None:
+            for _, _, other_batch, tid in group.overlapping(start, end):
+                if tid is not None and tid == ignore_id:
+                    continue
+                if not batch or not other_batch or batch == other_batch:
+                    return CLASS_CLASH
+
+        group = self.teachers.get(self._teacher_key(slot))
+        if group is not None:
+            for _, _, _, tid in group.overlapping(start, end):
+                if tid is not None and tid == ignore_id:
+                    continue
+                return TEACHER_CLASH
+
+        return None
+
+    # --------------------------------------------------
+    # LOADERS
+    # --------------------------------------------------
+    @classmethod
+    def load_all(cls, cur):
+        """Whole timetable in one query (bulk upload)."""
+        checker = cls()
+        cur.execute(f"SELECT {SLOT_COLUMNS} FROM timetable")
+        for row in _rows(cur):
+            checker.add(row)
+        return checker
+
+    @classmethod
+    def load_for(cls, cur, slot):
+        """Only the groups a single add / update can clash with."""
+        checker = cls()
+        cur.execute(f"""
+            SELECT {SLOT_COLUMNS}
+            FROM timetable
+            WHERE day_of_week=%s
+              AND ((department=%s AND year=%s AND division=%s) OR teacher_id=%s)
+        """, (
+            slot["day_of_week"], slot["department"], slot["year"],
+            slot["division"], slot["teacher_id"]
+        ))
+        for row in _rows(cur):
+            checker.add(row)
+        return checker
+
+
+def _rows(cur):
+    names = [d[0] for d in cur.description]
+    for row in cur.fetchall():
+        yield row if isinstance(row, dict) else dict(zip(names, row))
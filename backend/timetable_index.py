@@ -0,0 +1,147 @@
+from bisect import bisect_right
+from background_refresh import BackgroundRefresh
+from database import get_db_connection
+from utils import normalize_text
+
+# rebuild at least this often so edits made through another worker show up
+REFRESH_SECONDS = 300
+
+
+def to_seconds(value):
+    """TIME column (timedelta from mysql.connector) or 'HH:MM[:SS]' → seconds."""
+    if hasattr(value, "total_seconds"):
+        return int(value.total_seconds())
+    if isinstance(value, int):
+        return value
+    parts = [int(p) for p in str(value).split(":")]
+    while len(parts) < 3:
+        parts.append(0)
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+# ======================================================
+# SORTED INTERVAL LIST
+# ======================================================
+class IntervalList:
+    __slots__ = ("starts", "ends", "max_ends", "entries")
+
+    def __init__(self, items):
+        # items: [(start, end, entry)]
+        items.sort(key=lambda i: (i[0], i[1]))
+        self.starts = [i[0] for i in items]
+        self.ends = [i[1] for i in items]
+        self.entries = [i[2] for i in items]
+
+        # running max of end times lets the backwards scan stop early
+        self.max_ends = []
+        running = -1
+        for end in self.ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def find(self, t):
+        """Entry whose [start, end] contains t (inclusive, like BETWEEN)."""
+        i = bisect_right(self.starts, t) - 1
+        while i >= 0 and self.max_ends[i] >= t:
+            if self.ends[i] >= t:
+                return self.entries[i]
+            i -= 1
+        return None
+
+
+# ======================================================
+# WEEKLY SCHEDULE INDEX
+# ======================================================
+# (department, year, division, day) → {
+#     "lectures": IntervalList,            # batch IS NULL
+#     "batches":  {batch: IntervalList}    # practical overlays
+# }
+
+
+def _load():
+    conn = get_db_connection()
+    if conn is None:
+        return None
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute("""
+            SELECT department, year, division, batch, day_of_week,
+                   start_time, end_time, subject, teacher_id
+            FROM timetable
+        """)
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    grouped = {}
+    for r in rows:
+        key = (
+            normalize_text(r["department"], "upper"),
+            normalize_text(r["year"], "upper"),
+            normalize_text(r["division"], "upper"),
+            normalize_text(r["day_of_week"], "title")
+        )
+        slot = grouped.setdefault(key, {"lectures": [], "batches": {}})
+        item = (
+            to_seconds(r["start_time"]),
+            to_seconds(r["end_time"]),
+            {"subject": r["subject"], "teacher_id": r["teacher_id"]}
+        )
+        batch = normalize_text(r["batch"], "upper")
+        if batch:
+            slot["batches"].setdefault(batch, []).append(item)
+        else:
+            slot["lectures"].append(item)
+
+    index = {}
+    for key, slot in grouped.items():
+        index[key] = {
+            "lectures": IntervalList(slot["lectures"]),
+            "batches": {b: IntervalList(items) for b, items in slot["batches"].items()}
+        }
+    return index
+
+
+# Scans read whatever index is current; a dirty or expired one is
+# rebuilt on a background thread with its own connection.
+_index = BackgroundRefresh("timetable-index", _load, REFRESH_SECONDS)
+
+
+def rebuild():
+    """Blocking rebuild, used at startup."""
+    return _index.rebuild()
+
+
+def invalidate():
+    """Called by the /admin/timetable write endpoints."""
+    _index.invalidate()
+
+
+def current_lecture(department, year, division, batch, when):
+    """
+    Lecture/practical running at `when` for a class, or None.
+    Returns {"subject", "teacher_id"}.
+    """
+    index = _index.get() or {}
+
+    key = (
+        normalize_text(department, "upper"),
+        normalize_text(year, "upper"),
+        normalize_text(division, "upper"),
+        normalize_text(when.strftime("%A"), "title")
+    )
+    slot = index.get(key)
+    if slot is None:
+        return None
+
+    # same granularity as the old `'HH:MM' BETWEEN start_time AND end_time`
+    t = when.hour * 3600 + when.minute * 60
+
+    batch = normalize_text(batch, "upper")
+    if batch and batch in slot["batches"]:
+        hit = slot["batches"][batch].find(t)
+        if hit:
+            return hit
+
+    return slot["lectures"].find(t)
@@ -0,0 +1,136 @@
+import metadata_cache
+from background_refresh import BackgroundRefresh
+from database import get_db_connection
+from timetable_index import to_seconds
+from utils import normalize_text
+
+TTL_SECONDS = 300
+MAX_VIEWS = 500
+
+
+# ======================================================
+# COMPILED TIMETABLE VIEWS
+# ======================================================
+# GET /admin/timetable used to re-query and reformat every row. The
+# whole table is now read once per change, times are formatted once,
+# and each (filter, day) view is rendered to JSON + ETag on first use.
+#   by_class:   (department, year, division) -> rows (all batches)
+#   by_teacher: teacher_id -> rows
+# Timetable writes call invalidate(); the TTL covers other workers.
+
+def to_12_hour(value):
+    """TIME / 'HH:MM' → 'HH:MM AM/PM'."""
+    seconds = to_seconds(value)
+    h, m = seconds // 3600, (seconds % 3600) // 60
+    ampm = "AM" if h < 12 else "PM"
+    h = h % 12 or 12
+    return f"{h:02d}:{m:02d} {ampm}"
+
+
+def _load():
+    conn = get_db_connection()
+    if conn is None:
+        return None
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        # same order the endpoint has always returned
+        cur.execute("SELECT * FROM timetable ORDER BY day_of_week, start_time")
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    by_class = {}
+    by_teacher = {}
+    for row in rows:
+        row["start_time"] = to_12_hour(row["start_time"])
+        row["end_time"] = to_12_hour(row["end_time"])
+
+        class_key = (
+            normalize_text(row["department"], "upper"),
+            normalize_text(row["year"], "upper"),
+            normalize_text(row["division"], "upper")
+        )
+        by_class.setdefault(class_key, []).append(row)
+        by_teacher.setdefault(normalize_text(row["teacher_id"], "upper"), []).append(row)
+
+    return {
+        "rows": rows,
+        "by_class": by_class,
+        "by_teacher": by_teacher,
+        "rendered": {}          # view key -> (body, etag)
+    }
+
+
+# the admin timetable page waits for a due reload so an edit shows at once
+_snapshot = BackgroundRefresh("timetable-snapshot", _load, TTL_SECONDS)
+
+
+def snapshot():
+    return _snapshot.get(wait=True) or {"rows": [], "by_class": {}, "by_teacher": {}, "rendered": {}}
+
+
+def invalidate():
+    _snapshot.invalidate()
+
+
+def _match(value, wanted):
+    return (value or "").upper() == wanted.upper()
+
+
+def _select(snap, role, department, year, division, batch, teacher_id):
+    """Same filter semantics as the old SQL."""
+    if role == "student":
+        if department and year and division:
+            rows = snap["by_class"].get((
+                normalize_text(department, "upper"),
+                normalize_text(year, "upper"),
+                normalize_text(division, "upper")
+            ), [])
+        else:
+            rows = [
+                r for r in snap["rows"]
+                if (not department or _match(r["department"], department))
+                and (not year or _match(r["year"], year))
+                and (not division or _match(r["division"], division))
+            ]
+        if batch:
+            # lecture → batch NULL | practical → batch match
+            rows = [r for r in rows if r["batch"] is None or _match(r["batch"], batch)]
+        return rows
+
+    if role == "teacher" and teacher_id:
+        return snap["by_teacher"].get(normalize_text(teacher_id, "upper"), [])
+
+    return snap["rows"]
+
+
+def view(role=None, department=None, year=None, division=None,
+         batch=None, teacher_id=None, day_of_week=None):
+    """(body, etag) for one filtered view, rendered once per snapshot."""
+    snap = snapshot()
+    key = (
+        normalize_text(role, "lower"),
+        normalize_text(department, "upper"),
+        normalize_text(year, "upper"),
+        normalize_text(division, "upper"),
+        normalize_text(batch, "upper"),
+        normalize_text(teacher_id, "upper"),
+        normalize_text(day_of_week, "upper")
+    )
+
+    cached = snap["rendered"].get(key)
+    if cached is not None:
+        return cached
+
+    role, department, year, division, batch, teacher_id, day_of_week = key
+
+    rows = _select(snap, role, department, year, division, batch, teacher_id)
+    if day_of_week:
+        rows = [r for r in rows if _match(r["day_of_week"], day_of_week)]
+
+    rendered = metadata_cache.render(rows)
+    if len(snap["rendered"]) >= MAX_VIEWS:
+        snap["rendered"].clear()
+    snap["rendered"][key] = rendered
+    return rendered
@@ -1,130 +1,6 @@
-from database import get_db_connection
-from datetime import datetime
-
-# ======================================================
-# CHECK TEACHER
-# ======================================================
-def check_teacher(user_id):
-    conn = get_db_connection()
-    if conn is None:
-        return None
-
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT * FROM teachers WHERE teacher_id=%s LIMIT 1",
-        (user_id,)
-    )
-    result = cursor.fetchone()
-    conn.close()
-    return result
-
-
-# ======================================================
-# CHECK STUDENT
-# ======================================================
-def check_student(user_id):
-    conn = get_db_connection()
-    if conn is None:
-        return None
-
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT * FROM students WHERE student_id=%s LIMIT 1",
-        (user_id,)
-    )
-    result = cursor.fetchone()
-    conn.close()
-    return result
-
-
-# ======================================================
-# CHECK TIMETABLE (FOR FUTURE SKIP LOGIC)
-# ======================================================
-def check_timetable(dept, year, division):
-    conn = get_db_connection()
-    if conn is None:
-        return None
-
-    cursor = conn.cursor(dictionary=True)
-    now = datetime.now()
-
-    cursor.execute("""
-        SELECT *
-        FROM timetable
-        WHERE department=%s
-          AND year=%s
-          AND division=%s
-          AND day_of_week=%s
-          AND TIME(%s) BETWEEN start_time AND end_time
-        LIMIT 1
-    """, (
-        dept,
-        year,
-        division,
-        now.strftime("%A"),
-        now.strftime("%H:%M:%S")
-    ))
-
-    row = cursor.fetchone()
-    conn.close()
-    return row
-
-
-# ======================================================
-# INSERT LOG (FINAL & CORRECT)
-# ======================================================
-def insert_log(
-    student_id,
-    action,
-    status,
-    matched_subject=None,
-    matched_teacher_id=None
-):
-    conn = get_db_connection()
-    if conn is None:
-        return None
-
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO logs
-        (user_id, scan_time, action, status, matched_subject, matched_teacher_id)
-        VALUES (%s, NOW(), %s, %s, %s, %s)
-    """, (
-        student_id,
-        action,
-        status,
-        matched_subject,
-        matched_teacher_id
-    ))
-
-    log_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return log_id
-
-
-
-# ======================================================
-# GET LAST ACTION (ENTRY / EXIT)
-# ======================================================
-def get_last_action(user_id):
-    conn = get_db_connection()
-    if conn is None:
-        return None
-
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT action
-        FROM logs
-        WHERE user_id=%s
-        ORDER BY scan_time DESC
-        LIMIT 1
-    """, (user_id,))
-
-    row = cursor.fetchone()
-    conn.close()
-    return row["action"] if row else None
-
+import metrics
+import csv
+import io
 
 # ======================================================
 # PASSWORD UTILS (KEEP AS IS)
@@ -145,22 +21,24 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 # backend/utils.py
 
+import os
 import smtplib
 from email.mime.text import MIMEText
 
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-SENDER_EMAIL = "smartlibrary.alerts@gmail.com"
-SENDER_PASSWORD = ""
+SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "1") == "1"     # set 0 for a local SMTP stand-in
+SMTP_TIMEOUT = 10
+SENDER_EMAIL = os.getenv("SENDER_EMAIL", "smartlibrary.alerts@gmail.com")
+SENDER_PASSWORD = os.getenv("SENDER_PASSWORD", "")
 
-def send_skip_email(
-    teacher_email,
-    teacher_name,
-    student_name,
-    subject,
-    scan_time
-):
-    msg = MIMEText(f"""
+
+SKIP_EMAIL_SUBJECT = "Lecture Skipping Alert"
+
+
+def skip_email_body(teacher_name, student_name, subject, scan_time):
+    """Plain-text alert body (the outbox stores this, not the MIME payload)."""
+    return f"""
 Dear {teacher_name},
 
 The following student was detected inside the library
@@ -174,16 +52,48 @@ This is a system-generated alert.
 
 Regards,
 Smart Library Monitoring System
-""")
+"""
+
+
+def build_skip_email(
+    teacher_email,
+    teacher_name,
+    student_name,
+    subject,
+    scan_time
+):
+    msg = MIMEText(skip_email_body(teacher_name, student_name, subject, scan_time))
 
-    msg["Subject"] = "Lecture Skipping Alert"
+    msg["Subject"] = SKIP_EMAIL_SUBJECT
     msg["From"] = SENDER_EMAIL
     msg["To"] = teacher_email
+    return msg
 
-    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-    server.starttls()
-    server.login(SENDER_EMAIL, SENDER_PASSWORD)
-    server.send_message(msg)
+
+def open_smtp_session():
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    if SMTP_USE_TLS:
+        server.starttls()
+    if SENDER_PASSWORD:
+        server.login(SENDER_EMAIL, SENDER_PASSWORD)
+    return server
+
+
+def send_skip_email(
+    teacher_email,
+    teacher_name,
+    student_name,
+    subject,
+    scan_time
+):
+    msg = build_skip_email(
+        teacher_email, teacher_name,
+        student_name, subject, scan_time
+    )
+
+    server = open_smtp_session()
+    with metrics.smtp_latency.time("sent"):
+        server.send_message(msg)
     server.quit()
 
 
@@ -209,6 +119,24 @@ def normalize_text(value: str, mode="upper"):
     return value
 
 
+# ======================================================
+# CSV UPLOADS
+# ======================================================
+def iter_csv_upload(upload):
+    """
+    Yields CSV dict rows straight from an UploadFile's spooled temp file,
+    decoding as it goes, so the upload is never held in memory as one
+    string. utf-8-sig drops the BOM Excel adds.
+    """
+    upload.file.seek(0)
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        # leave the underlying file to FastAPI
+        text.detach()
+
+
 # ======================================================
 # TEMPORARY TEST CODE (ADD ONLY FOR TESTING)
 # ======================================================
@@ -0,0 +1,40 @@
+import axios from "axios";
+
+// Session token issued by /admin/login (kept with the admin info)
+export function getToken() {
+  try {
+    return JSON.parse(localStorage.getItem("admin"))?.token || "";
+  } catch {
+    return "";
+  }
+}
+
+// EventSource can't send headers, so the token goes in the query string
+export function withToken(url) {
+  const token = getToken();
+  if (!token) return url;
+  return `${url}${url.includes("?") ? "&" : "?"}token=${encodeURIComponent(token)}`;
+}
+
+export function installAuthInterceptors() {
+  axios.interceptors.request.use((config) => {
+    const token = getToken();
+    if (token) {
+      config.headers = config.headers || {};
+      config.headers.Authorization = `Bearer ${token}`;
+    }
+    return config;
+  });
+
+  axios.interceptors.response.use(
+    (res) => res,
+    (err) => {
+      // expired or missing session → back to login
+      if (err.response?.status === 401 && localStorage.getItem("admin")) {
+        localStorage.removeItem("admin");
+        window.location.replace("/admin/login");
+      }
+      return Promise.reject(err);
+    }
+  );
+}
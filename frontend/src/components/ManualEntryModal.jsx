@@ -1,5 +1,6 @@
 import React, { useState } from "react";
 import axios from "axios";
+import MemberSearchInput from "./MemberSearchInput";
 import "../styles/logs.css";
 
 function ManualEntryModal({ onClose, onSaved }) {
@@ -44,11 +45,11 @@ function ManualEntryModal({ onClose, onSaved }) {
         <h3>Manual Entry / Exit</h3>
 
         <label>User ID</label>
-        <input
+        <MemberSearchInput
           name="user_id"
           value={form.user_id}
           onChange={handleChange}
-          placeholder="Enter Student / Teacher ID"
+          placeholder="Enter Student / Teacher ID or name"
         />
 
         <label>Action</label>
@@ -0,0 +1,60 @@
+import React, { useEffect, useState } from "react";
+import axios from "axios";
+
+// Type-ahead over /admin/members/search (ID prefix + name match)
+function MemberSearchInput({ value, onChange, onSelect, role = "", placeholder, name }) {
+  const [results, setResults] = useState([]);
+  const listId = `member-search-${name || "q"}`;
+
+  useEffect(() => {
+    const q = value.trim();
+    if (!q) {
+      setResults([]);
+      return;
+    }
+
+    // small debounce so every keystroke doesn't hit the API
+    const timer = setTimeout(async () => {
+      try {
+        const res = await axios.get(
+          "http://127.0.0.1:8000/admin/members/search",
+          { params: { q, role, limit: 8 } }
+        );
+        setResults(res.data.data || []);
+      } catch {
+        setResults([]);
+      }
+    }, 120);
+
+    return () => clearTimeout(timer);
+  }, [value, role]);
+
+  const handleChange = (e) => {
+    onChange(e);
+    const picked = results.find((m) => m.member_id === e.target.value);
+    if (picked && onSelect) onSelect(picked);
+  };
+
+  return (
+    <>
+      <input
+        name={name}
+        value={value}
+        onChange={handleChange}
+        placeholder={placeholder}
+        list={listId}
+        autoComplete="off"
+      />
+      <datalist id={listId}>
+        {results.map((m) => (
+          <option key={m.member_id} value={m.member_id}>
+            {m.name} · {m.department}
+            {m.role === "student" ? ` ${m.year}-${m.division}` : " (Teacher)"}
+          </option>
+        ))}
+      </datalist>
+    </>
+  );
+}
+
+export default MemberSearchInput;
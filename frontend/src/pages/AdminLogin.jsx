@@ -25,7 +25,11 @@ function AdminLogin() {
       setError("Invalid username or password");
     }
   } catch (err) {
-    setError("Server Error ❌");
+    if (err.response?.status === 429) {
+      setError("Too many attempts, please wait and try again");
+    } else {
+      setError("Server Error ❌");
+    }
   }
 };
 
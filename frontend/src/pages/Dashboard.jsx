@@ -18,6 +18,7 @@ import {
 } from "recharts";
 
 import "../styles/Dashboard.css";
+import { withToken } from "../auth";
 
 const COLORS = ["#7b2cbf", "#9d4edd", "#c77dff", "#6a0dad"];
 
@@ -138,12 +139,9 @@ const loadAttendanceTimeline = async (filters = lineFilters) => {
   useEffect(() => {
     async function fetchData() {
       try {
-        const [sRes, cRes] = await Promise.all([
-          axios.get("http://127.0.0.1:8000/admin/summary"),
-          axios.get("http://127.0.0.1:8000/admin/stats/charts"),
-        ]);
-        setSummary(sRes.data);
-        setCharts(cRes.data);
+        const res = await axios.get("http://127.0.0.1:8000/admin/dashboard");
+        setSummary(res.data.summary);
+        setCharts(res.data.charts);
       } catch {
         setErr("Failed to load dashboard");
       } finally {
@@ -153,6 +151,28 @@ const loadAttendanceTimeline = async (filters = lineFilters) => {
     fetchData();
   }, []);
 
+  // ------------------ LIVE UPDATES (SSE) ------------------
+  useEffect(() => {
+    const source = new EventSource(withToken("http://127.0.0.1:8000/admin/events"));
+
+    source.addEventListener("scan", (e) => {
+      const { delta } = JSON.parse(e.data);
+      setSummary((prev) =>
+        prev
+          ? {
+              ...prev,
+              today_entries: prev.today_entries + delta.entries,
+              today_exits: prev.today_exits + delta.exits,
+              skipping_alerts: prev.skipping_alerts + delta.skips,
+              total_logs: prev.total_logs + delta.logs,
+            }
+          : prev
+      );
+    });
+
+    return () => source.close();
+  }, []);
+
   // ------------------ DEFAULT PIE ------------------
   useEffect(() => {
     loadMemberChart();
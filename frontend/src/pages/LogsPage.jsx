@@ -1,8 +1,26 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import axios from "axios";
 import ManualEntryModal from "../components/ManualEntryModal";
 import "../styles/logs.css";
 import AdminLayout from "../components/AdminLayout";
+import { withToken } from "../auth";
+
+
+const mapLog = (log) => ({
+  log_id: log.log_id,
+  user_id: log.user_id,
+  name: log.name,
+  role: log.role,
+  department: log.department,
+  action: log.action,
+  timestamp: new Date(log.scan_time).toLocaleString(),
+
+  // derive remarks for UI
+  status:
+    log.status === "SKIP"
+      ? `${log.matched_subject || "Class"} Skipped`
+      : "Normal",
+});
 
 
 function LogsPage() {
@@ -48,21 +66,7 @@ const [batches, setBatches] = useState([]);
     });
 
     // 🔁 map backend response → UI expected structure
-    const mappedLogs = (res.data.data || []).map((log) => ({
-      log_id: log.log_id,
-      user_id: log.user_id,
-      name: log.name,
-      role: log.role,
-      department: log.department,
-      action: log.action,
-      timestamp: new Date(log.scan_time).toLocaleString(),
-
-      // derive remarks for UI
-      status:
-        log.status === "SKIP"
-          ? `${log.matched_subject || "Class"} Skipped`
-          : "Normal",
-    }));
+    const mappedLogs = (res.data.data || []).map(mapLog);
 
     setLogs(mappedLogs);
     setTotalPages(res.data.total_pages || 1);
@@ -78,6 +82,27 @@ const [batches, setBatches] = useState([]);
     fetchLogs(1);
   }, []);
 
+  // 🔴 live rows: prepend new scans while viewing the unfiltered first page
+  const liveRef = useRef({ page: 1, filtered: false });
+  liveRef.current = {
+    page,
+    filtered: Object.values(filters).some((v) => v),
+  };
+
+  useEffect(() => {
+    const source = new EventSource(withToken("http://127.0.0.1:8000/admin/events"));
+
+    source.addEventListener("scan", (e) => {
+      const { page: current, filtered } = liveRef.current;
+      if (current !== 1 || filtered) return;
+
+      const { log } = JSON.parse(e.data);
+      setLogs((prev) => [mapLog(log), ...prev].slice(0, pageSize));
+    });
+
+    return () => source.close();
+  }, []);
+
   const handleFilterChange = (e) => {
     setFilters({ ...filters, [e.target.name]: e.target.value });
   };
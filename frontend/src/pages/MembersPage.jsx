@@ -1,16 +1,21 @@
 import React, { useEffect, useState } from "react";
 import axios from "axios";
 import AdminLayout from "../components/AdminLayout";
+import MemberSearchInput from "../components/MemberSearchInput";
 import "../styles/members.css";
 
 export default function MembersPage() {
   const [role, setRole] = useState("");
   const [members, setMembers] = useState([]);
   const [file, setFile] = useState(null);
+  const [uploadMode, setUploadMode] = useState("insert");
+  const [deactivateMissing, setDeactivateMissing] = useState(false);
 
   // pagination
   const [page, setPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
+  const [cursors, setCursors] = useState({ current: "", next: null, prev: null });
+  const [search, setSearch] = useState("");
 
   // filters (selected values)
   const [filters, setFilters] = useState({
@@ -46,7 +51,8 @@ export default function MembersPage() {
   const [editForm, setEditForm] = useState(null);
 
   // ================= LOAD MEMBERS =================
-  const loadMembers = async (r, p = 1) => {
+  // cursor = keyset position from the previous response (page 1 has none)
+  const loadMembers = async (r, p = 1, cursor = "", memberId = "") => {
     if (!r) return;
 
     try {
@@ -54,8 +60,10 @@ export default function MembersPage() {
         `http://127.0.0.1:8000/admin/members/${r}`,
         {
           params: {
-            page: p,
+            paging: "cursor",
+            cursor: p === 1 ? "" : cursor,
             page_size: 10,
+            member_id: memberId,
             ...filters
           }
         }
@@ -63,6 +71,11 @@ export default function MembersPage() {
 
       setMembers(res.data.data || []);
       setTotalPages(res.data.total_pages || 1);
+      setCursors({
+        current: p === 1 ? "" : cursor,
+        next: res.data.next_cursor,
+        prev: res.data.prev_cursor
+      });
       setPage(p);
     } catch {
       alert("Failed to load members");
@@ -216,7 +229,7 @@ export default function MembersPage() {
       );
       alert("Updated successfully");
       setShowEdit(false);
-      loadMembers(role, page);
+      loadMembers(role, page, cursors.current);
     } catch (err) {
       alert(err.response?.data?.detail || "Update failed");
     }
@@ -239,6 +252,8 @@ export default function MembersPage() {
     const fd = new FormData();
     fd.append("role", role);
     fd.append("file", file);
+    fd.append("mode", uploadMode);
+    fd.append("deactivate_missing", uploadMode === "sync" && deactivateMissing);
 
     try {
       const res = await axios.post(
@@ -246,9 +261,17 @@ export default function MembersPage() {
         fd
       );
 
-      alert(
-        `Upload completed\n\nAdded: ${res.data.added}\nSkipped: ${res.data.skipped}`
-      );
+      if (res.data.mode === "sync") {
+        alert(
+          `Roster synced\n\nAdded: ${res.data.added}\nUpdated: ${res.data.updated}` +
+          `\nUnchanged: ${res.data.unchanged}\nDeactivated: ${res.data.deactivated}` +
+          `\nSkipped: ${res.data.skipped}`
+        );
+      } else {
+        alert(
+          `Upload completed\n\nAdded: ${res.data.added}\nSkipped: ${res.data.skipped}`
+        );
+      }
 
       loadMembers(role, 1);
       setFile(null);
@@ -272,6 +295,7 @@ export default function MembersPage() {
               const r = e.target.value;
               setRole(r);
               setPage(1);
+              setSearch("");
               setFilters({ department: "", year: "", division: "", batch: "" });
               loadFilterOptions(r);
               loadMembers(r, 1);
@@ -287,6 +311,18 @@ export default function MembersPage() {
           <>
             {/* FILTER BAR */}
             <div className="members-filters">
+              <MemberSearchInput
+                name="member_search"
+                role={role}
+                value={search}
+                onChange={(e) => {
+                  setSearch(e.target.value);
+                  if (!e.target.value) loadMembers(role, 1);
+                }}
+                onSelect={(m) => loadMembers(role, 1, "", m.member_id)}
+                placeholder="Search ID or name"
+              />
+
               <select
                 value={filters.department}
                 onChange={(e) =>
@@ -417,8 +453,8 @@ export default function MembersPage() {
               {/* PAGINATION */}
               <div className="pagination">
                 <button
-                  disabled={page === 1}
-                  onClick={() => loadMembers(role, page - 1)}
+                  disabled={page === 1 || !cursors.prev}
+                  onClick={() => loadMembers(role, page - 1, cursors.prev)}
                 >
                   Prev
                 </button>
@@ -426,8 +462,8 @@ export default function MembersPage() {
                 <span>Page {page} of {totalPages}</span>
 
                 <button
-                  disabled={page === totalPages}
-                  onClick={() => loadMembers(role, page + 1)}
+                  disabled={!cursors.next}
+                  onClick={() => loadMembers(role, page + 1, cursors.next)}
                 >
                   Next
                 </button>
@@ -631,6 +667,23 @@ export default function MembersPage() {
                   onChange={(e) => setFile(e.target.files[0])}
                   required
                 />
+                <select
+                  value={uploadMode}
+                  onChange={(e) => setUploadMode(e.target.value)}
+                >
+                  <option value="insert">Add new only</option>
+                  <option value="sync">Sync roster (add + update)</option>
+                </select>
+                {uploadMode === "sync" && (
+                  <label>
+                    <input
+                      type="checkbox"
+                      checked={deactivateMissing}
+                      onChange={(e) => setDeactivateMissing(e.target.checked)}
+                    />
+                    Deactivate members missing from file
+                  </label>
+                )}
                 <button type="submit" className="btn">
                   Upload
                 </button>